@@ -5,13 +5,41 @@ import subprocess
 import tempfile
 import shutil
 
+from bootimg import open_tree, unpack
+from catalog import open_catalog, pop_catalog_arg
+from datasource import FileSource
+
+# Образы, которые разбираются по заголовкам, а не поиском сигнатур
+STRUCTURED = ("boot", "vendor_boot", "dtbo")
+
+def run_tool(cmd, check=False, **kwargs):
+    """subprocess.run для внешней утилиты, её вывод печатается через print.
+
+    Под демоном extractd задача работает в потоке, а stdout/stderr процесса
+    ведут в /dev/null: вывод дочерней утилиты нужно пропустить через
+    sys.stdout, тогда он попадёт в журнал задачи.
+    """
+    if "stdout" in kwargs:
+        kwargs["stderr"] = subprocess.PIPE  # stdout занят данными
+    else:
+        kwargs["stdout"] = subprocess.PIPE
+        kwargs["stderr"] = subprocess.STDOUT
+    result = subprocess.run(cmd, **kwargs)
+    output = result.stderr if kwargs["stderr"] is subprocess.PIPE else result.stdout
+    text = (output or b"").decode(errors="replace").rstrip()
+    if text:
+        print(text)
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd)
+    return result
+
 def is_gzip(file_path):
     with open(file_path, "rb") as f:
         return f.read(2) == b'\x1f\x8b'
 
 def is_lz4(file_path):
     with open(file_path, "rb") as f:
-        return f.read(4) == b'\x02\x21\x4c\x18'
+        return f.read(4) in (b'\x02\x21\x4c\x18', b'\x04\x22\x4d\x18')
 
 def decompress(file_path, out_dir):
     """Распаковка gzip/lz4, возвращает путь к распакованному файлу"""
@@ -20,11 +48,12 @@ def decompress(file_path, out_dir):
     
     if is_gzip(file_path):
         print(f"[+] Распаковка gzip: {base_name}")
-        subprocess.run(["gunzip", "-c", file_path], stdout=open(decompressed_path, "wb"))
+        with open(decompressed_path, "wb") as out:
+            run_tool(["gunzip", "-c", file_path], stdout=out)
         return decompressed_path
     elif is_lz4(file_path):
         print(f"[+] Распаковка lz4: {base_name}")
-        subprocess.run(["lz4", "-d", file_path, decompressed_path])
+        run_tool(["lz4", "-d", file_path, decompressed_path])
         return decompressed_path
     else:
         return file_path  # уже распакован
@@ -32,15 +61,34 @@ def decompress(file_path, out_dir):
 def extract_cpio(cpio_file, out_dir):
     """Распаковать cpio архив"""
     print(f"[+] Распаковка cpio: {cpio_file}")
-    subprocess.run(["cpio", "-idm", "--no-absolute-filenames"], cwd=out_dir, stdin=open(cpio_file, "rb"))
+    with open(cpio_file, "rb") as f:
+        run_tool(["cpio", "-idm", "--no-absolute-filenames"], cwd=out_dir, stdin=f)
 
-def extract_bootimg(boot_img, out_dir):
-    if not os.path.isfile(boot_img):
-        print(f"[-] Файл не найден: {boot_img}")
-        return
+def extract_components(boot_img, out_dir):
+    """Разбор boot v0–v4, vendor_boot и dtbo по заголовкам.
 
-    os.makedirs(out_dir, exist_ok=True)
+    Каждый компонент (в т.ч. фрагменты vendor ramdisk и отдельные DTB)
+    сохраняется своим файлом, ramdisk распаковывается в папку рядом с ним.
+    Возвращает False, если формат не распознан.
+    """
+    src = FileSource(boot_img)
+    try:
+        root = open_tree(src)
+        if root.kind not in STRUCTURED:
+            return False
+        print(f"[+] {root.kind} {root.info}")
+        for target, path, node in unpack(root, out_dir):
+            print(f"[+] {path} @ 0x{node.offset:x} ({node.size} байт) → {target}")
+            if "ramdisk" in path and node.kind in ("gzip", "lz4", "cpio"):
+                contents = os.path.splitext(target)[0]
+                os.makedirs(contents, exist_ok=True)
+                extract_cpio(decompress(target, os.path.dirname(target)), contents)
+        return True
+    finally:
+        src.close()
 
+def carve_parts(boot_img, out_dir):
+    """Старый способ для неизвестных форматов: всё от найденной сигнатуры до конца"""
     with open(boot_img, "rb") as f:
         data = f.read()
 
@@ -69,17 +117,33 @@ def extract_bootimg(boot_img, out_dir):
 
         extracted_any = True
 
+    return extracted_any
+
+def extract_bootimg(boot_img, out_dir, catalog=None):
+    if not os.path.isfile(boot_img):
+        print(f"[-] Файл не найден: {boot_img}")
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    extracted_any = extract_components(boot_img, out_dir) or carve_parts(boot_img, out_dir)
     if not extracted_any:
         print("[-] Не найден kernel, initrd или ramdisk")
     else:
+        recorder = open_catalog(catalog, boot_img)
+        if recorder is not None:
+            # картинки из ramdisk (res/images и т.п.), распакованные cpio
+            print(f"[+] В каталог добавлено картинок: {recorder.add_tree(out_dir)}")
+            recorder.close()
         print(f"[✓] Готово! Все файлы в: {out_dir}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(f"Использование: python {sys.argv[0]} <boot.img> <output_folder>")
+    catalog, args = pop_catalog_arg(sys.argv[1:])
+    if len(args) != 2:
+        print(f"Использование: python {sys.argv[0]} <boot.img|vendor_boot.img|dtbo.img> <output_folder> [--catalog база]")
         sys.exit(1)
 
-    boot_img_path = sys.argv[1]
-    output_folder = sys.argv[2]
+    boot_img_path = args[0]
+    output_folder = args[1]
 
-    extract_bootimg(boot_img_path, output_folder)
\ No newline at end of file
+    extract_bootimg(boot_img_path, output_folder, catalog=catalog)
\ No newline at end of file
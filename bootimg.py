@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""Разметка Android boot/recovery образов (заголовок ANDROID!, версии 0–4),
+vendor_boot (VNDRBOOT, v3–v4), dtbo.img и склеенных DTB.
+
+Заголовок описывает размеры разделов образа, сами разделы идут подряд,
+каждый выровнен на страницу. Класс BootImage читает только заголовок и
+знает, где лежит каждый компонент и в каком поле заголовка его размер —
+этого хватает и для извлечения, и для перепаковки.
+
+open_tree() строит из образа дерево компонентов (Node): vendor_boot →
+фрагменты vendor ramdisk из таблицы, dtb → отдельные FDT, dtbo → записи
+таблицы. Узел при создании читает только свой заголовок, дети строятся
+при первом обращении, данные — только в read()/save() и только свой
+диапазон байт, поэтому список компонентов 100-мегабайтного образа
+получается мгновенно.
+
+Использование:
+    python bootimg.py list <образ>
+    python bootimg.py unpack <образ> <папка> [компонент ...]
+"""
+import os
+import re
+import sys
+import struct
+import hashlib
+import argparse
+from collections import namedtuple
+
+BOOT_MAGIC = b"ANDROID!"
+VENDOR_BOOT_MAGIC = b"VNDRBOOT"
+V3_PAGE_SIZE = 4096
+VENDOR_HEADER_V4_SIZE = 2128
+FDT_MAGIC = 0xd00dfeed
+FDT_HEADER_SIZE = 40
+DTBO_MAGIC = 0xd7b7ab1e
+DTBO_HEADER_SIZE = 32
+SAVE_CHUNK = 1 << 20
+PAGE_SIZES = (2048, 4096, 8192, 16384)
+
+# name — имя компонента, offset/size — данные в образе, size_field — смещение
+# поля размера в заголовке
+Component = namedtuple("Component", "name offset size size_field")
+
+# Поля размеров: (имя, смещение поля) в порядке расположения компонентов
+_V0_FIELDS = [("kernel", 8), ("ramdisk", 16), ("second", 24)]
+# Старые образы Qualcomm/Samsung (mkbootimg из CAF): в поле версии лежит
+# dt_size, а таблица QCDT идёт после second
+_V0_QCDT_FIELDS = _V0_FIELDS + [("dt", 40)]
+_V1_FIELDS = _V0_FIELDS + [("recovery_dtbo", 1632)]
+_V2_FIELDS = _V1_FIELDS + [("dtb", 1648)]
+_V3_FIELDS = [("kernel", 8), ("ramdisk", 12)]
+_V4_FIELDS = _V3_FIELDS + [("signature", 1580)]
+
+# vendor_boot: компоненты идут после заголовка, выровненного на страницу
+_VENDOR_V3_FIELDS = [("vendor_ramdisk", 24), ("dtb", 2100)]
+_VENDOR_V4_FIELDS = _VENDOR_V3_FIELDS + [("vendor_ramdisk_table", 2112), ("bootconfig", 2124)]
+
+RECOVERY_DTBO_OFFSET_FIELD = 1636
+ID_FIELD = 576
+
+# Запись таблицы vendor ramdisk (v4); offset — от начала секции vendor_ramdisk
+VendorRamdisk = namedtuple("VendorRamdisk", "name type offset size board_id")
+_VENDOR_RAMDISK_ENTRY = struct.Struct("<III32s64s")
+RAMDISK_TYPES = {0: "none", 1: "platform", 2: "recovery", 3: "dlkm"}
+
+# Запись dtbo.img: offset — от начала таблицы, flags (v1) — сжатие
+DtboEntry = namedtuple("DtboEntry", "offset size id rev flags")
+
+
+def align(size, page):
+    return (size + page - 1) // page * page
+
+
+class _Layout:
+    """Общая часть заголовков: компоненты подряд с data_start, каждый выровнен"""
+
+    def sizes(self):
+        return [struct.unpack_from("<I", self.header, field)[0] for _, field in self.fields]
+
+    def components(self):
+        """Компоненты с их смещениями; пустые тоже (у них size == 0)"""
+        result = []
+        offset = self.data_start
+        for (name, field), size in zip(self.fields, self.sizes()):
+            result.append(Component(name, offset, size, field))
+            offset += align(size, self.page_size)
+        return result
+
+    def component(self, name):
+        for comp in self.components():
+            if comp.name == name:
+                return comp
+        raise KeyError(f"в образе v{self.version} нет компонента {name}")
+
+
+class BootImage(_Layout):
+    """Заголовок boot-образа: размеры и расположение компонентов"""
+
+    def __init__(self, header):
+        if header[:8] != BOOT_MAGIC:
+            raise ValueError("нет сигнатуры ANDROID!")
+        self.header = bytes(header)
+        self.version = struct.unpack_from("<I", header, 40)[0]
+        if self.version in (3, 4):
+            self.page_size = V3_PAGE_SIZE
+            fields = _V4_FIELDS if self.version == 4 else _V3_FIELDS
+        else:
+            self.page_size = struct.unpack_from("<I", header, 36)[0]
+            if self.page_size not in PAGE_SIZES:
+                raise ValueError(f"странный размер страницы {self.page_size}")
+            if self.version > 2:
+                # в v0 поле версии занято dt_size (QCDT) — это тоже компонент
+                self.version = 0
+                fields = _V0_QCDT_FIELDS
+            else:
+                fields = {0: _V0_FIELDS, 1: _V1_FIELDS, 2: _V2_FIELDS}[self.version]
+        self.fields = fields
+        self.data_start = self.page_size  # заголовок занимает первую страницу
+
+    @classmethod
+    def read(cls, src, offset=0):
+        """Прочитать заголовок из источника (заголовок всегда меньше 4 КиБ)"""
+        return cls(src.get(offset, offset + V3_PAGE_SIZE))
+
+    def with_sizes(self, new_sizes, payloads):
+        """Новый заголовок с другими размерами компонентов.
+
+        payloads — данные всех компонентов по порядку; нужны для SHA1 в поле
+        id (v0–v2) и для смещения recovery_dtbo (v1–v2).
+        """
+        header = bytearray(self.header)
+        for (_, field), size in zip(self.fields, new_sizes):
+            struct.pack_into("<I", header, field, size)
+        if self.version < 3:
+            if self.version >= 1:
+                offset = self.page_size
+                for (name, _), size in zip(self.fields, new_sizes):
+                    if name == "recovery_dtbo":
+                        struct.pack_into("<Q", header, RECOVERY_DTBO_OFFSET_FIELD, offset if size else 0)
+                    offset += align(size, self.page_size)
+            # id — SHA1 от (данные, размер) каждого компонента, как в mkbootimg
+            sha = hashlib.sha1()
+            for data in payloads:
+                if data:
+                    sha.update(data)
+                sha.update(struct.pack("<I", len(data)))
+            header[ID_FIELD:ID_FIELD + 32] = sha.digest().ljust(32, b"\0")
+        return bytes(header[:self.page_size])
+
+
+class VendorBootImage(_Layout):
+    """Заголовок vendor_boot: vendor ramdisk, dtb, таблица фрагментов, bootconfig"""
+
+    def __init__(self, header):
+        if header[:8] != VENDOR_BOOT_MAGIC:
+            raise ValueError("нет сигнатуры VNDRBOOT")
+        self.header = bytes(header)
+        self.version, self.page_size = struct.unpack_from("<II", header, 8)
+        if self.version not in (3, 4):
+            raise ValueError(f"неизвестная версия vendor_boot {self.version}")
+        if self.page_size not in PAGE_SIZES:
+            raise ValueError(f"странный размер страницы {self.page_size}")
+        self.name = header[2080:2096].split(b"\0")[0].decode("ascii", "replace")
+        header_size = struct.unpack_from("<I", header, 2096)[0]
+        self.fields = _VENDOR_V4_FIELDS if self.version == 4 else _VENDOR_V3_FIELDS
+        self.data_start = align(header_size, self.page_size)
+
+    @classmethod
+    def read(cls, src, offset=0):
+        return cls(src.get(offset, offset + VENDOR_HEADER_V4_SIZE))
+
+    def ramdisks(self, src, offset=0):
+        """Таблица фрагментов vendor ramdisk (только v4, читается только она)"""
+        if self.version < 4:
+            return []
+        count, entry_size = struct.unpack_from("<II", self.header, 2116)
+        if entry_size < _VENDOR_RAMDISK_ENTRY.size:
+            raise ValueError(f"странный размер записи таблицы ramdisk {entry_size}")
+        table = self.component("vendor_ramdisk_table")
+        if count * entry_size > table.size:
+            raise ValueError("таблица vendor ramdisk не помещается в свою секцию")
+        start = offset + table.offset
+        data = src.get(start, start + count * entry_size)
+        if len(data) < count * entry_size:
+            raise ValueError("таблица vendor ramdisk обрезана")
+        result = []
+        for i in range(count):
+            size, rd_offset, rd_type, name, board_id = _VENDOR_RAMDISK_ENTRY.unpack_from(data, i * entry_size)
+            result.append(VendorRamdisk(name.split(b"\0")[0].decode("ascii", "replace"),
+                                        rd_type, rd_offset, size, struct.unpack("<16I", board_id)))
+        return result
+
+
+def fdt_size(src, offset):
+    """totalsize из заголовка FDT или None, если по смещению не FDT"""
+    head = src.get(offset, offset + FDT_HEADER_SIZE)
+    if len(head) < FDT_HEADER_SIZE:
+        return None
+    magic, total = struct.unpack_from(">II", head)
+    if magic != FDT_MAGIC or total < FDT_HEADER_SIZE:
+        return None
+    return total
+
+
+def dtb_blobs(src, offset, size):
+    """(смещение, размер) каждого FDT в секции dtb — их там бывает несколько подряд"""
+    result = []
+    pos, end = offset, offset + size
+    while pos + FDT_HEADER_SIZE <= end:
+        total = fdt_size(src, pos)
+        if total is None:
+            # между блобами иногда выравнивание на 8 байт
+            pos = align(pos + 1, 8)
+            total = fdt_size(src, pos)
+            if total is None:
+                break
+        result.append((pos, min(total, end - pos)))
+        pos += total
+    return result
+
+
+def dtbo_entries(src, offset):
+    """Заголовок dt_table (dtbo.img) и его записи"""
+    head = src.get(offset, offset + DTBO_HEADER_SIZE)
+    if len(head) < DTBO_HEADER_SIZE:
+        raise ValueError("заголовок dtbo обрезан")
+    magic, total, header_size, entry_size, count, entries_offset, page_size, version = \
+        struct.unpack(">8I", head)
+    if magic != DTBO_MAGIC:
+        raise ValueError("нет сигнатуры dtbo")
+    if entry_size < 32:
+        raise ValueError(f"странный размер записи dtbo {entry_size}")
+    data = src.get(offset + entries_offset, offset + entries_offset + count * entry_size)
+    if len(data) < count * entry_size:
+        raise ValueError("таблица dtbo обрезана")
+    result = []
+    for i in range(count):
+        dt_size, dt_offset, dt_id, dt_rev, flags = struct.unpack_from(">5I", data, i * entry_size)
+        result.append(DtboEntry(dt_offset, dt_size, dt_id, dt_rev, flags if version >= 1 else 0))
+    return total, version, result
+
+
+# ─── дерево компонентов ─────────────────────────────────────────────────
+
+_SIGNATURES = [
+    (BOOT_MAGIC, "boot"),
+    (VENDOR_BOOT_MAGIC, "vendor_boot"),
+    (struct.pack(">I", DTBO_MAGIC), "dtbo"),
+    (struct.pack(">I", FDT_MAGIC), "dtb"),
+    (b"\x1f\x8b", "gzip"),
+    (b"\x02\x21\x4c\x18", "lz4"),   # legacy, так жмёт ramdisk mkbootimg
+    (b"\x04\x22\x4d\x18", "lz4"),   # frame
+    (b"070701", "cpio"),
+    (b"070702", "cpio"),
+]
+
+# Расширения файлов при распаковке по типу узла
+EXTENSIONS = {
+    "boot": ".img", "vendor_boot": ".img", "dtbo": ".img", "dtb": ".dtb",
+    "gzip": ".gz", "lz4": ".lz4", "zlib": ".zlib", "cpio": ".cpio", "text": ".txt",
+}
+
+# Сжатие записи dtbo v1 (младшие 4 бита flags)
+_DTBO_COMPRESSION = {1: "zlib", 2: "gzip"}
+
+
+def detect(src, offset):
+    """Тип данных по сигнатуре в начале (читает 8 байт)"""
+    head = src.get(offset, offset + 8)
+    for magic, kind in _SIGNATURES:
+        if head.startswith(magic):
+            return kind
+    return "data"
+
+
+class Node:
+    """Узел дерева компонентов: диапазон байт источника и разобранный заголовок.
+
+    children строится при первом обращении, данные читаются только в
+    read()/save() — и только [offset, offset + size).
+    """
+
+    def __init__(self, src, name, offset, size, kind="data", info="", header=None, expand=None):
+        self.src = src
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.kind = kind
+        self.info = info
+        self.header = header
+        self._expand = expand
+        self._children = None
+
+    def __repr__(self):
+        return f"<Node {self.name} {self.kind} @0x{self.offset:x} +{self.size}>"
+
+    @property
+    def children(self):
+        if self._children is None:
+            try:
+                self._children = self._expand(self) if self._expand else []
+            except (ValueError, struct.error) as e:
+                # битая таблица не мешает сохранить узел целиком
+                self._children = []
+                self.info = f"{self.info}, таблица не разобрана: {e}".lstrip(", ")
+        return self._children
+
+    def read(self):
+        return self.src.get(self.offset, self.offset + self.size)
+
+    def save(self, path):
+        """Записать данные узла в файл кусками, не держа их целиком в памяти"""
+        end = self.offset + self.size
+        with open(path, "wb") as out:
+            for start in range(self.offset, end, SAVE_CHUNK):
+                out.write(self.src.get(start, min(start + SAVE_CHUNK, end)))
+
+    def walk(self, prefix=""):
+        """(путь, узел) для всех потомков, в глубину"""
+        for child in self.children:
+            path = prefix + child.name
+            yield path, child
+            yield from child.walk(path + "/")
+
+    def find(self, path):
+        """Потомок по пути вида vendor_ramdisk/recovery или recovery_dtbo/dtbo3"""
+        node = self
+        for part in path.strip("/").split("/"):
+            for child in node.children:
+                if child.name == part:
+                    node = child
+                    break
+            else:
+                raise KeyError(f"нет компонента {path}")
+        return node
+
+
+def _safe_name(name, fallback, used):
+    """Имя из таблицы образа, пригодное для файла и уникальное среди соседей"""
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", name).strip("._") or fallback
+    if name in used:
+        name = f"{name}_{fallback}"
+    used.add(name)
+    return name
+
+
+def _boot_node(src, name, offset, size):
+    boot = BootImage.read(src, offset)
+
+    def expand(node):
+        return [make_node(src, c.name, offset + c.offset, c.size)
+                for c in boot.components() if c.size]
+
+    return Node(src, name, offset, size, "boot", f"v{boot.version}, страница {boot.page_size}",
+                boot, expand)
+
+
+def _vendor_ramdisk_node(src, vboot, offset, comp):
+    start = offset + comp.offset
+    entries = vboot.ramdisks(src, offset)
+
+    def expand(node):
+        children = []
+        used = set()
+        for i, entry in enumerate(entries):
+            if entry.offset + entry.size > comp.size:
+                raise ValueError(f"фрагмент ramdisk {i} выходит за секцию")
+            child = make_node(src, _safe_name(entry.name, f"ramdisk{i}", used),
+                              start + entry.offset, entry.size)
+            child.info = RAMDISK_TYPES.get(entry.type, f"тип {entry.type}")
+            children.append(child)
+        return children
+
+    info = f"фрагментов: {len(entries)}" if entries else ""
+    return Node(src, comp.name, start, comp.size, "ramdisks" if entries else detect(src, start),
+                info, entries, expand if entries else None)
+
+
+def _vendor_boot_node(src, name, offset, size):
+    vboot = VendorBootImage.read(src, offset)
+
+    def expand(node):
+        children = []
+        for comp in vboot.components():
+            if not comp.size or comp.name == "vendor_ramdisk_table":
+                continue  # таблица представлена детьми vendor_ramdisk
+            if comp.name == "vendor_ramdisk":
+                children.append(_vendor_ramdisk_node(src, vboot, offset, comp))
+            elif comp.name == "bootconfig":
+                children.append(Node(src, comp.name, offset + comp.offset, comp.size, "text"))
+            else:
+                children.append(make_node(src, comp.name, offset + comp.offset, comp.size))
+        return children
+
+    info = f"v{vboot.version}, страница {vboot.page_size}"
+    if vboot.name:
+        info += f", {vboot.name}"
+    return Node(src, name, offset, size, "vendor_boot", info, vboot, expand)
+
+
+def _dtb_node(src, name, offset, size):
+    version = struct.unpack(">I", src.get(offset + 20, offset + 24))[0]
+
+    def expand(node):
+        blobs = dtb_blobs(src, offset, size)
+        if len(blobs) < 2:
+            return []  # один FDT на всю секцию — это лист
+        return [Node(src, f"dtb{i}", start, length, "dtb")
+                for i, (start, length) in enumerate(blobs)]
+
+    return Node(src, name, offset, size, "dtb", f"FDT v{version}", None, expand)
+
+
+def _dtbo_node(src, name, offset, size):
+    total, version, entries = dtbo_entries(src, offset)
+
+    def expand(node):
+        children = []
+        for i, entry in enumerate(entries):
+            child = make_node(src, f"dtbo{i}", offset + entry.offset, entry.size)
+            compression = _DTBO_COMPRESSION.get(entry.flags & 0xf)
+            if compression:
+                child.kind = compression
+            info = f"id=0x{entry.id:x} rev=0x{entry.rev:x}"
+            child.info = f"{info}, {child.info}" if child.info else info
+            children.append(child)
+        return children
+
+    return Node(src, name, offset, min(size, total), "dtbo",
+                f"v{version}, записей: {len(entries)}", entries, expand)
+
+
+_PARSERS = {
+    "boot": _boot_node,
+    "vendor_boot": _vendor_boot_node,
+    "dtb": _dtb_node,
+    "dtbo": _dtbo_node,
+}
+
+
+def make_node(src, name, offset, size):
+    """Узел для диапазона: тип по сигнатуре, заголовок разбирается сразу"""
+    kind = detect(src, offset)
+    parser = _PARSERS.get(kind)
+    if parser is None:
+        return Node(src, name, offset, size, kind)
+    try:
+        return parser(src, name, offset, size)
+    except (ValueError, struct.error) as e:
+        return Node(src, name, offset, size, "data", f"заголовок не разобран: {e}")
+
+
+def open_tree(src, offset=0, size=None, name=None):
+    """Корень дерева компонентов образа из источника (FileSource)"""
+    if size is None:
+        size = src.size - offset
+    return make_node(src, name or os.path.basename(src.path), offset, size)
+
+
+def unpack(root, out_dir, paths=None):
+    """Сохранить компоненты в out_dir.
+
+    Без paths — все листья дерева (узел с детьми представлен детьми),
+    иначе — указанные узлы целиком. Вложенные узлы ложатся в подпапки:
+    vendor_ramdisk/recovery.lz4. Возвращает [(файл, путь в дереве, узел)].
+    """
+    if paths:
+        selected = [(path.strip("/"), root.find(path)) for path in paths]
+    else:
+        selected = [(path, node) for path, node in root.walk() if not node.children]
+    result = []
+    for path, node in selected:
+        target = os.path.join(out_dir, *path.split("/")) + EXTENSIONS.get(node.kind, "")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        node.save(target)
+        result.append((target, path, node))
+    return result
+
+
+def print_tree(node, depth=0):
+    print(f"{'  ' * depth}{node.name:<{28 - 2 * depth}} 0x{node.offset:08x} {node.size:>10}  "
+          f"{node.kind:<11} {node.info}".rstrip())
+    for child in node.children:
+        print_tree(child, depth + 1)
+
+
+if __name__ == "__main__":
+    from datasource import FileSource
+
+    parser = argparse.ArgumentParser(
+        description="Компоненты boot / vendor_boot / dtbo образов",
+        epilog="Компоненты задаются путём из list: vendor_ramdisk/recovery, dtbo3, dtb/dtb1")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="дерево компонентов (читаются только заголовки)")
+    p_list.add_argument("image")
+    p_unpack = sub.add_parser("unpack", help="сохранить компоненты")
+    p_unpack.add_argument("image")
+    p_unpack.add_argument("output", help="папка вывода")
+    p_unpack.add_argument("paths", nargs="*", help="какие компоненты (по умолчанию все листья)")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.image):
+        print(f"[-] Файл не найден: {args.image}")
+        sys.exit(1)
+    src = FileSource(args.image)
+    try:
+        root = open_tree(src)
+        if args.command == "list":
+            print_tree(root)
+        else:
+            try:
+                saved = unpack(root, args.output, args.paths)
+            except KeyError as e:
+                print(f"[-] {e.args[0]}")
+                sys.exit(1)
+            for target, path, node in saved:
+                print(f"[+] {path} @ 0x{node.offset:x} ({node.size} байт) → {target}")
+            if not saved:
+                print("[-] Компоненты не найдены: формат образа не распознан")
+                sys.exit(1)
+            print(f"[✓] Готово! Все файлы в: {args.output}")
+    finally:
+        src.close()
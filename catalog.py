@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Каталог извлечённых картинок в SQLite.
+
+Карверы с --catalog <база> записывают сюда каждую найденную картинку:
+исходный файл, смещение, формат, размеры, SHA-256 и перцептивный хэш
+(dHash, 64 бита). Так вопросы «где ещё встречается этот логотип» и «что
+поменялось между прошивками» решаются запросом по индексу, без повторного
+сканирования дампов.
+
+Похожие картинки ищутся по расстоянию Хэмминга между dHash. Хэш хранится
+ещё и восемью байтами в отдельных индексированных столбцах: если хэши
+отличаются не больше чем в 7 битах, хотя бы один байт у них совпадает,
+поэтому кандидатов даёт индекс, а точное расстояние считается только для
+них.
+
+    python catalog.py <база> sources
+    python catalog.py <база> where <картинка> [--distance N]
+    python catalog.py <база> diff <сборка_A> <сборка_B> [--distance N]
+
+Размеры и dHash считаются через Pillow; без него в каталог попадают
+только SHA-256 и смещения.
+"""
+import io
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # без Pillow нет размеров и перцептивного хэша
+    Image = None
+
+BANDS = 8                   # байтов dHash в индексированных столбцах
+MAX_DISTANCE = BANDS - 1    # больше индекс не гарантирует
+DEFAULT_DISTANCE = 5
+COMMIT_INTERVAL = 2.0       # секунды между фиксациями при записи
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    label TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    added REAL NOT NULL,
+    UNIQUE (path, size, mtime_ns)
+);
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    container TEXT NOT NULL DEFAULT '',
+    offset INTEGER,
+    format TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    width INTEGER,
+    height INTEGER,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    phash INTEGER,
+    {", ".join(f"b{i} INTEGER" for i in range(BANDS))}
+);
+CREATE INDEX IF NOT EXISTS images_sha256 ON images(sha256);
+CREATE INDEX IF NOT EXISTS images_source ON images(source_id, offset);
+CREATE INDEX IF NOT EXISTS images_name ON images(source_id, name);
+{"".join(f"CREATE INDEX IF NOT EXISTS images_b{i} ON images(b{i});" for i in range(BANDS))}
+"""
+
+
+def dhash(image):
+    """64-битный dHash: яркость соседних пикселей уменьшенной до 9x8 картинки"""
+    gray = image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col + 1] > pixels[row * 9 + col])
+    return value
+
+
+def image_info(data):
+    """(ширина, высота, dHash) или (None, None, None), если Pillow не справился"""
+    if Image is None:
+        return None, None, None
+    try:
+        image = Image.open(io.BytesIO(data))
+        width, height = image.size
+        image.draft("L", (64, 64))  # JPEG декодируется сразу уменьшенным — в разы быстрее
+        return width, height, dhash(image)
+    except Exception:
+        return None, None, None
+
+
+def _signed(value):
+    """SQLite хранит знаковые 64-битные целые"""
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+def _unsigned(value):
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+def _bands(phash):
+    if phash is None:
+        return [None] * BANDS
+    return [(phash >> (8 * i)) & 0xFF for i in range(BANDS)]
+
+
+def _distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class Catalog:
+    def __init__(self, path):
+        self.path = path
+        # одна база на несколько процессов (очередь задач в GUI, демон)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._last_commit = time.monotonic()
+
+    def source(self, input_file, label=None):
+        """id записи об исходном файле (та же версия файла — та же запись)"""
+        path = os.path.abspath(input_file) if input_file != "-" else "-"
+        size = mtime_ns = None
+        if os.path.isfile(input_file):
+            st = os.stat(input_file)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        with self.lock:
+            row = self.db.execute("SELECT id FROM sources WHERE path IS ? AND size IS ? AND mtime_ns IS ?",
+                                  (path, size, mtime_ns)).fetchone()
+            if row:
+                return row[0]
+            cur = self.db.execute("INSERT INTO sources (path, label, size, mtime_ns, added) VALUES (?, ?, ?, ?, ?)",
+                                  (path, "", size, mtime_ns, time.time()))
+            source_id = cur.lastrowid
+            self.db.execute("UPDATE sources SET label = ? WHERE id = ?",
+                            (self._unique_label(path, label, source_id), source_id))
+            self.db.commit()
+            return source_id
+
+    def _unique_label(self, path, label, source_id):
+        """Метка, которой ещё нет в каталоге.
+
+        Две сборки с одинаковым boot.img иначе неразличимы в where и diff:
+        сначала пробуем имя файла, потом «папка/имя», в крайнем случае
+        добавляем id.
+        """
+        if label:
+            candidates = [label]
+        else:
+            parent = os.path.basename(os.path.dirname(path))
+            candidates = [os.path.basename(path)] + ([f"{parent}/{os.path.basename(path)}"] if parent else [])
+        for candidate in candidates:
+            if self.db.execute("SELECT 1 FROM sources WHERE label = ?", (candidate,)).fetchone() is None:
+                return candidate
+        return f"{candidates[0]}#{source_id}"
+
+    def add(self, source_id, offset, fmt, data, name=None, container=""):
+        width, height, phash = image_info(data)
+        key = [source_id, container, offset, fmt.lstrip(".").lower(), name or ""]
+        row = key + [width, height, len(data), hashlib.sha256(data).hexdigest(), _signed(phash)] + _bands(phash)
+        with self.lock:
+            # повторный проход (--resume, перезапуск) перезаписывает, а не дублирует
+            self.db.execute("DELETE FROM images WHERE source_id = ? AND container = ? AND offset IS ? "
+                            "AND format = ? AND name = ?", key)
+            self.db.execute(f"INSERT INTO images (source_id, container, offset, format, name, width, "
+                            f"height, size, sha256, phash, {', '.join(f'b{i}' for i in range(BANDS))}) "
+                            f"VALUES ({', '.join('?' * len(row))})", row)
+            if time.monotonic() - self._last_commit >= COMMIT_INTERVAL:
+                self.db.commit()
+                self._last_commit = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    # ─── Запросы ────────────────────────────────────────────────────────
+
+    def resolve_source(self, key):
+        """Сборка по id, метке или полному пути.
+
+        По пути берётся последняя добавленная версия файла. Метка должна
+        указывать на одну сборку: в базах, где метки ещё повторяются,
+        неоднозначная метка — ошибка, а не случайный выбор.
+        """
+        if str(key).isdigit():
+            row = self.db.execute("SELECT id FROM sources WHERE id = ?", (int(key),)).fetchone()
+            if row is None:
+                raise KeyError(f"нет такой сборки в каталоге: {key}")
+            return row[0]
+        rows = self.db.execute("SELECT id FROM sources WHERE label = ?", (key,)).fetchall()
+        if len(rows) > 1:
+            raise KeyError(f"метка {key} неоднозначна ({', '.join(str(r[0]) for r in rows)}) — укажите id или путь")
+        if rows:
+            return rows[0][0]
+        row = self.db.execute("SELECT id FROM sources WHERE path = ? ORDER BY added DESC LIMIT 1",
+                              (os.path.abspath(key),)).fetchone()
+        if row is None:
+            raise KeyError(f"нет такой сборки в каталоге: {key}")
+        return row[0]
+
+    def similar(self, phash, distance=DEFAULT_DISTANCE, source_id=None):
+        """Картинки с dHash не дальше distance бит: [(расстояние, строка images)]"""
+        if distance > MAX_DISTANCE:
+            raise ValueError(f"расстояние больше {MAX_DISTANCE} индекс не покрывает")
+        bands = _bands(phash)
+        query = (f"SELECT * FROM images WHERE ({' OR '.join(f'b{i} = ?' for i in range(BANDS))})")
+        params = list(bands)
+        if source_id is not None:
+            query += " AND source_id = ?"
+            params.append(source_id)
+        result = []
+        for row in self.db.execute(query, params):
+            d = _distance(phash, _unsigned(row["phash"]))
+            if d <= distance:
+                result.append((d, row))
+        return sorted(result, key=lambda item: item[0])
+
+    def exact(self, sha256, source_id=None):
+        query = "SELECT * FROM images WHERE sha256 = ?"
+        params = [sha256]
+        if source_id is not None:
+            query += " AND source_id = ?"
+            params.append(source_id)
+        return self.db.execute(query, params).fetchall()
+
+    def diff(self, source_a, source_b, distance=DEFAULT_DISTANCE):
+        """Сравнить две сборки.
+
+        Возвращает (изменённые [(строка A, строка B, расстояние)],
+        только в A, только в B). Картинки с именем (файлы param, ресурсы
+        ramdisk) сравниваются по имени; безымянные находки карверов — по
+        содержимому: совпал SHA-256 — та же, есть похожая по dHash —
+        изменённая.
+        """
+        changed, only_a = self._match(source_a, source_b, distance)
+        _, only_b = self._match(source_b, source_a, distance)
+        return changed, only_a, only_b
+
+    def _match(self, source_from, source_to, distance):
+        changed, missing = [], []
+        for row in self.db.execute("SELECT * FROM images WHERE source_id = ? ORDER BY offset", (source_from,)):
+            if row["name"]:
+                same_name = self.db.execute("SELECT * FROM images WHERE source_id = ? AND name = ? "
+                                            "AND container = ?", (source_to, row["name"], row["container"])).fetchone()
+                if same_name is not None:
+                    if same_name["sha256"] != row["sha256"]:
+                        d = None
+                        if row["phash"] is not None and same_name["phash"] is not None:
+                            d = _distance(_unsigned(row["phash"]), _unsigned(same_name["phash"]))
+                        changed.append((row, same_name, d))
+                    continue
+            if self.exact(row["sha256"], source_to):
+                continue
+            near = []
+            if row["phash"] is not None:
+                near = self.similar(_unsigned(row["phash"]), distance, source_to)
+            if near:
+                changed.append((row, near[0][1], near[0][0]))
+            else:
+                missing.append(row)
+        return changed, missing
+
+
+class Recorder:
+    """Запись находок одного запуска карвера: сборка и путь во вложенных потоках"""
+
+    def __init__(self, catalog, source_id, container=""):
+        self.catalog = catalog
+        self.source_id = source_id
+        self.container = container
+
+    def add(self, offset, fmt, data, name=None):
+        try:
+            self.catalog.add(self.source_id, offset, fmt, data, name, self.container)
+        except sqlite3.Error as e:
+            print(f"[!] Каталог: не удалось записать картинку @ 0x{offset or 0:x}: {e}")
+
+    def add_file(self, path, name, offset=None):
+        with open(path, "rb") as f:
+            self.add(offset, os.path.splitext(path)[1], f.read(), name)
+
+    def add_tree(self, root):
+        """Все картинки из папки (то, что распаковали внешние инструменты)"""
+        count = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                    path = os.path.join(dirpath, filename)
+                    self.add_file(path, os.path.relpath(path, root))
+                    count += 1
+        return count
+
+    def child(self, label):
+        """Запись для вложенного потока: путь копится в поле container"""
+        container = f"{self.container}/{label}" if self.container else label
+        return Recorder(self.catalog, self.source_id, container)
+
+    def close(self):
+        self.catalog.close()
+
+
+def open_catalog(db_path, input_file, label=None):
+    """Recorder для карвера или None, если каталог не запрошен"""
+    if not db_path:
+        return None
+    catalog = Catalog(db_path)
+    recorder = Recorder(catalog, catalog.source(input_file, label))
+    print(f"[+] Каталог: {db_path}")
+    return recorder
+
+
+def pop_catalog_arg(args):
+    """Вырезать '--catalog <база>' из аргументов скриптов с ручным разбором"""
+    if "--catalog" not in args:
+        return None, args
+    i = args.index("--catalog")
+    if i + 1 >= len(args):
+        print("[-] После --catalog нужен путь к базе")
+        sys.exit(1)
+    return args[i + 1], args[:i] + args[i + 2:]
+
+
+# ─── Командная строка ───────────────────────────────────────────────────
+
+def _where(row):
+    place = f"{row['container']}/" if row["container"] else ""
+    offset = f"0x{row['offset']:08x}" if row["offset"] is not None else "-"
+    dims = f"{row['width']}x{row['height']}" if row["width"] else "?"
+    return f"{place}{offset}  {row['format']:<5} {dims:>10}  {row['name'] or ''}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Каталог извлечённых картинок")
+    parser.add_argument("db", help="файл базы SQLite")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("sources", help="список сборок в каталоге")
+    p_where = sub.add_parser("where", help="где ещё встречается эта картинка")
+    p_where.add_argument("image")
+    p_where.add_argument("--distance", type=int, default=DEFAULT_DISTANCE,
+                         help=f"допустимое отличие dHash в битах (0..{MAX_DISTANCE})")
+    p_diff = sub.add_parser("diff", help="что поменялось между сборками")
+    p_diff.add_argument("a", help="id, метка или путь сборки")
+    p_diff.add_argument("b")
+    p_diff.add_argument("--distance", type=int, default=DEFAULT_DISTANCE)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.db):
+        print(f"[-] Каталог не найден: {args.db}")
+        sys.exit(1)
+    catalog = Catalog(args.db)
+    labels = {row["id"]: row["label"] for row in catalog.db.execute("SELECT id, label FROM sources")}
+
+    if args.cmd == "sources":
+        for row in catalog.db.execute("SELECT s.*, COUNT(i.id) AS n FROM sources s "
+                                      "LEFT JOIN images i ON i.source_id = s.id GROUP BY s.id ORDER BY s.id"):
+            print(f"{row['id']:4d}  {row['n']:6d} картинок  {row['label']}  ({row['path']})")
+
+    elif args.cmd == "where":
+        with open(args.image, "rb") as f:
+            data = f.read()
+        sha = hashlib.sha256(data).hexdigest()
+        for row in catalog.exact(sha):
+            print(f"=  {labels[row['source_id']]}  {_where(row)}")
+        _, _, phash = image_info(data)
+        if phash is None:
+            print("[!] dHash не посчитан (нет Pillow или картинка не читается) — только точные совпадения")
+        else:
+            for d, row in catalog.similar(phash, args.distance):
+                if row["sha256"] != sha:
+                    print(f"~{d} {labels[row['source_id']]}  {_where(row)}")
+
+    elif args.cmd == "diff":
+        try:
+            a, b = catalog.resolve_source(args.a), catalog.resolve_source(args.b)
+        except KeyError as e:
+            print(f"[-] {e}")
+            sys.exit(1)
+        changed, only_a, only_b = catalog.diff(a, b, args.distance)
+        for row_a, row_b, d in changed:
+            print(f"~{'?' if d is None else d}  {_where(row_a)}  →  {_where(row_b)}")
+        for row in only_a:
+            print(f"-   {_where(row)}")
+        for row in only_b:
+            print(f"+   {_where(row)}")
+        print(f"[✓] изменено {len(changed)}, только в {labels[a]}: {len(only_a)}, только в {labels[b]}: {len(only_b)}")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
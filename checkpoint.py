@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Контрольные точки для возобновляемого извлечения.
+
+Карверы периодически сохраняют смещение сканирования и список уже
+записанных файлов в выходную папку. По SIGTERM/SIGINT выставляется флаг
+чистой остановки: карвер дописывает состояние и выходит с кодом
+STOP_EXIT_CODE, а следующий запуск с --resume продолжает с того же места.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import contextvars
+
+CHECKPOINT_NAME = ".extractor_checkpoint.json"
+STOP_EXIT_CODE = 75  # EX_TEMPFAIL: остановлено, состояние сохранено
+SAVE_INTERVAL = 5.0  # секунды между автосохранениями
+
+# Демон extractd.py выполняет карверы в своих потоках: через эти переменные
+# контекста он передаёт флаг остановки задачи и получает смещение сканирования
+job_stop_event = contextvars.ContextVar("job_stop_event", default=None)
+progress_hook = contextvars.ContextVar("progress_hook", default=None)
+
+
+def checkpoint_path(output_dir):
+    return os.path.join(output_dir, CHECKPOINT_NAME)
+
+
+def input_signature(input_file):
+    """Отпечаток входного файла: путь, размер и время изменения"""
+    st = os.stat(input_file)
+    return {
+        "path": os.path.abspath(input_file),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def has_checkpoint(output_dir, input_file, tool):
+    """Есть ли в папке незавершённое извлечение этого файла этим инструментом"""
+    try:
+        with open(checkpoint_path(output_dir), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        return saved.get("tool") == tool and saved.get("input") == input_signature(input_file)
+    except Exception:
+        return False
+
+
+class Checkpoint:
+    """Состояние одного запуска карвера.
+
+    state — произвольный JSON-совместимый словарь (смещение, счётчики),
+    emitted — имена уже записанных файлов в порядке появления.
+    resumable=False — вход нельзя перечитать (pipe, stdin): состояние не
+    сохраняется, но чистая остановка по сигналу работает.
+    """
+
+    def __init__(self, output_dir, input_file, tool, interval=SAVE_INTERVAL, stop_event=None,
+                 resumable=True):
+        self.path = checkpoint_path(output_dir)
+        self.tool = tool
+        self.top_level = input_file is not None  # у вложенных потоков входа нет
+        self.resumable = resumable
+        self.input = input_signature(input_file) if resumable else None
+        self.interval = interval
+        self.state = {}
+        self.emitted = []
+        self.stop_event = stop_event or job_stop_event.get() or threading.Event()
+        # state меняют и потоки вложенных распаковок: все изменения и
+        # сериализация — под этой блокировкой
+        self.lock = threading.RLock()
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """Загрузить сохранённое состояние; False если его нет или файл другой"""
+        if not self.resumable:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get("tool") != self.tool or saved.get("input") != self.input:
+            return False
+        self.state = saved.get("state", {})
+        self.emitted = saved.get("emitted", [])
+        return True
+
+    def save(self):
+        if not self.resumable:
+            return
+        with self.lock:
+            text = json.dumps({
+                "tool": self.tool,
+                "input": self.input,
+                "state": self.state,
+                "emitted": self.emitted,
+            })
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # атомарная замена — при убийстве процесса остаётся старая или новая точка
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def update(self, **state):
+        """Обновить состояние и сохранить его, если прошёл интервал"""
+        with self.lock:
+            self.state.update(state)
+        hook = progress_hook.get()
+        if hook is not None and self.top_level and "offset" in state:
+            hook(state["offset"])
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def emit(self, name):
+        with self.lock:
+            self.emitted.append(name)
+
+    def clear(self):
+        """Извлечение завершено полностью — точка больше не нужна"""
+        if not self.resumable:
+            return
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def stop_requested(self):
+        return self.stop_event.is_set()
+
+    def stop_and_exit(self, **state):
+        """Сохранить состояние и выйти с кодом чистой остановки"""
+        with self.lock:
+            self.state.update(state)
+        self.save()
+        if self.resumable:
+            print(f"[!] Остановлено. Контрольная точка сохранена: {self.path}")
+        else:
+            print("[!] Остановлено. Поток нельзя перечитать — продолжение невозможно.")
+        sys.exit(STOP_EXIT_CODE)
+
+
+def install_stop_handler(checkpoint):
+    """SIGTERM/SIGINT не убивают процесс, а просят карвер остановиться чисто"""
+    def _handler(signum, frame):
+        checkpoint.stop_event.set()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            signal.signal(sig, _handler)
+        except (ValueError, OSError):
+            # не главный поток или сигнал недоступен на платформе
+            pass
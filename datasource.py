@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Источники данных для карверов.
+
+FileSource — обычный файл через mmap: доступен целиком, ничего не копирует.
+StreamSource — поток без seek (stdin, pipe от `adb exec-out dd`, блочное
+устройство): держит в памяти только скользящее окно
+[позиция - lookbehind, позиция + window].
+
+Оба источника адресуются абсолютными смещениями от начала входа, поэтому
+карвер пишется один раз и работает с обоими.
+"""
+import os
+import sys
+import mmap
+import stat
+import contextvars
+
+CHUNK_SIZE = 1 << 20              # сколько читать из потока за раз
+DEFAULT_WINDOW = 16 * 1024 * 1024  # максимальный просмотр вперёд для потока
+
+# Кэш уже открытых файлов (его подставляет демон extractd.py): повторная
+# задача по тому же входу получает готовое отображение, а не открывает файл
+source_cache = contextvars.ContextVar("source_cache", default=None)
+
+
+class FileSource:
+    """Обычный файл, отображённый в память"""
+    seekable = True
+    window = None  # смотреть вперёд можно без ограничений
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "rb")
+        self.size = os.fstat(self._f.fileno()).st_size
+        if self.size:
+            self.data = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""  # mmap не умеет файлы нулевой длины
+
+    def find(self, sub, start, end=None):
+        return self.data.find(sub, start, self.size if end is None else min(end, self.size))
+
+    def get(self, start, end):
+        return self.data[max(0, start):min(end, self.size)]
+
+    def at_eof(self, offset):
+        return offset >= self.size
+
+    def release(self, offset):
+        pass
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._f.close()
+
+
+class StreamSource:
+    """Поток, который можно читать только вперёд.
+
+    lookbehind — сколько байт держать левее текущей позиции поиска
+    (для multiext это 200 байт, где ищется имя файла), window — сколько
+    можно смотреть вперёд от начала изображения.
+    """
+    seekable = False
+    size = None
+
+    def __init__(self, f, lookbehind=0, window=DEFAULT_WINDOW, chunk_size=CHUNK_SIZE):
+        self.path = getattr(f, "name", "-")
+        self._f = f
+        self.lookbehind = lookbehind
+        self.window = window
+        self.chunk_size = chunk_size
+        self.base = 0          # абсолютное смещение buf[0]
+        self.buf = bytearray()
+        self.eof = False
+
+    @property
+    def end(self):
+        return self.base + len(self.buf)
+
+    def fill(self, end):
+        """Дочитать поток так, чтобы окно покрывало [.., end)"""
+        while not self.eof and self.end < end:
+            chunk = self._f.read(max(self.chunk_size, end - self.end))
+            if not chunk:
+                self.eof = True
+                break
+            self.buf += chunk
+
+    def release(self, offset):
+        """Отбросить всё левее offset"""
+        drop = min(offset, self.end) - self.base
+        if drop > 0:
+            del self.buf[:drop]
+            self.base += drop
+
+    def find(self, sub, start, end=None):
+        """Найти sub в [start, end).
+
+        Без end ищет до конца потока, по пути отбрасывая данные левее
+        start - lookbehind, так что память остаётся ограниченной.
+        """
+        if end is not None:
+            self.fill(end)
+            pos = self.buf.find(sub, max(start - self.base, 0), max(end - self.base, 0))
+            return -1 if pos == -1 else pos + self.base
+
+        while True:
+            self.fill(start + self.chunk_size + len(sub))
+            pos = self.buf.find(sub, max(start - self.base, 0))
+            if pos != -1:
+                return pos + self.base
+            if self.eof:
+                return -1
+            start = max(start, self.end - len(sub) + 1)
+            self.release(start - self.lookbehind)
+
+    def get(self, start, end):
+        self.fill(end)
+        return bytes(self.buf[max(start - self.base, 0):max(end - self.base, 0)])
+
+    def at_eof(self, offset):
+        self.fill(offset + 1)
+        return self.eof and offset >= self.end
+
+    def close(self):
+        if self._f is not sys.stdin.buffer:
+            self._f.close()
+
+
+def is_stream_path(path):
+    """Вход, который нельзя отобразить в память: '-', pipe, устройство"""
+    if path == "-":
+        return True
+    try:
+        return not stat.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def open_source(path, lookbehind=0, window=DEFAULT_WINDOW):
+    """Открыть путь как FileSource или StreamSource ('-' — stdin)"""
+    if path == "-":
+        return StreamSource(sys.stdin.buffer, lookbehind, window)
+    if is_stream_path(path):
+        return StreamSource(open(path, "rb", buffering=0), lookbehind, window)
+    cache = source_cache.get()
+    if cache is not None:
+        return cache.open(path)
+    return FileSource(path)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Карта энтропии дампа: сортировка областей перед поиском сигнатур.
+
+Энтропия и заполненность считаются по блокам векторно на NumPy. Карверы
+используют карту так:
+  * области, целиком залитые 0x00 или 0xFF, не сканируются;
+  * в высокоэнтропийных (сжатых/зашифрованных) областях сигнатура
+    принимается только после строгой проверки заголовка — там `BM` и
+    `FF D8 FF` почти всегда случайные совпадения.
+
+Отдельно: python entropy.py <дамп> <папка> — текстовая раскладка дампа
+и PNG-тепловая карта (одна строка картинки — 1 МиБ).
+"""
+import os
+import sys
+import zlib
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: без него триаж просто отключается
+    np = None
+
+from datasource import open_source
+
+BLOCK_SIZE = 4096
+REGION_BLOCKS = 256                        # блоков в регионе (1 МиБ), строка тепловой карты
+REGION_SIZE = BLOCK_SIZE * REGION_BLOCKS
+HIGH_ENTROPY = 7.5                         # бит/байт: сжатое или зашифрованное
+LOW_ENTROPY = 3.0                          # бит/байт: текст, таблицы, разреженные данные
+
+FILL_NONE, FILL_ZERO, FILL_ERASED = 0, 1, 2
+
+
+def block_stats(data, block_size=BLOCK_SIZE):
+    """Энтропия (бит/байт) и тип заливки для каждого блока data.
+
+    Гистограммы всех блоков считаются одним np.bincount по индексам
+    номер_блока * 256 + байт. Неполный последний блок считается отдельно.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    full = len(arr) // block_size
+    entropy = []
+    fill = []
+    if full:
+        blocks = arr[:full * block_size].reshape(full, block_size)
+        e, f = _stats(blocks, block_size)
+        entropy.append(e)
+        fill.append(f)
+    if len(arr) % block_size:
+        tail = arr[full * block_size:]
+        e, f = _stats(tail.reshape(1, -1), len(tail))
+        entropy.append(e)
+        fill.append(f)
+    if not entropy:
+        return np.zeros(0, np.float32), np.zeros(0, np.uint8)
+    return np.concatenate(entropy), np.concatenate(fill)
+
+
+def _stats(blocks, length):
+    n = blocks.shape[0]
+    idx = blocks.astype(np.int32) + (np.arange(n, dtype=np.int32) * 256)[:, None]
+    counts = np.bincount(idx.ravel(), minlength=n * 256).reshape(n, 256)
+    p = counts / float(length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.where(counts > 0, p * np.log2(p), 0.0).sum(axis=1)
+    fill = np.full(n, FILL_NONE, dtype=np.uint8)
+    fill[counts[:, 0] == length] = FILL_ZERO
+    fill[counts[:, 255] == length] = FILL_ERASED
+    return entropy.astype(np.float32), fill
+
+
+class Triage:
+    """Ленивая карта энтропии источника, посчитанная по регионам в 1 МиБ"""
+
+    def __init__(self, src, threshold=HIGH_ENTROPY):
+        self.src = src
+        self.threshold = threshold
+        self.regions = {}  # номер региона -> (энтропия, заливка)
+
+    def prepare(self, start, end):
+        """Посчитать регионы, покрывающие [start, end), пока они в окне источника"""
+        for index in range(start // REGION_SIZE, (end + REGION_SIZE - 1) // REGION_SIZE):
+            if index in self.regions:
+                continue
+            region_start = index * REGION_SIZE
+            data = self.src.get(region_start, region_start + REGION_SIZE)
+            if data:
+                self.regions[index] = block_stats(data)
+
+    def _block(self, pos):
+        region = self.regions.get(pos // REGION_SIZE)
+        if region is None:
+            return None
+        block = (pos % REGION_SIZE) // BLOCK_SIZE
+        if block >= len(region[0]):
+            return None
+        return region[0][block], region[1][block]
+
+    def is_high(self, pos):
+        """Попадает ли pos в сжатую/зашифрованную область"""
+        stats = self._block(pos)
+        if stats is None:
+            # регион не подготовлен (поиск прыгает по потоку) — оцениваем блок от pos
+            entropy, _ = block_stats(self.src.get(pos, pos + BLOCK_SIZE))
+            return bool(len(entropy)) and entropy[0] >= self.threshold
+        return stats[0] >= self.threshold
+
+    def is_fill(self, start, end):
+        """Залит ли диапазон целиком 0x00/0xFF (тогда сигнатур в нём быть не может)"""
+        self.prepare(start, end)
+        for index in range(start // REGION_SIZE, (end + REGION_SIZE - 1) // REGION_SIZE):
+            region = self.regions.get(index)
+            if region is None:
+                return False
+            first = max(start - index * REGION_SIZE, 0) // BLOCK_SIZE
+            last = min(end - index * REGION_SIZE, REGION_SIZE) // BLOCK_SIZE
+            if not (region[1][first:last] != FILL_NONE).all():
+                return False
+        return True
+
+    def full_map(self):
+        """Энтропия и заливка всех посчитанных блоков подряд"""
+        if not self.regions:
+            return np.zeros(0, np.float32), np.zeros(0, np.uint8)
+        last = max(self.regions)
+        entropy = np.full((last + 1) * REGION_BLOCKS, np.nan, dtype=np.float32)
+        fill = np.zeros((last + 1) * REGION_BLOCKS, dtype=np.uint8)
+        for index, (e, f) in self.regions.items():
+            entropy[index * REGION_BLOCKS:index * REGION_BLOCKS + len(e)] = e
+            fill[index * REGION_BLOCKS:index * REGION_BLOCKS + len(f)] = f
+        size = last * REGION_BLOCKS + len(self.regions[last][0])
+        return entropy[:size], fill[:size]
+
+    def export(self, output_dir, name="entropy"):
+        """Записать раскладку (<name>_layout.txt) и тепловую карту (<name>_map.png)"""
+        entropy, fill = self.full_map()
+        layout_path = os.path.join(output_dir, f"{name}_layout.txt")
+        with open(layout_path, "w", encoding="utf-8") as f:
+            f.write(layout_report(entropy, fill))
+        print(f"[+] Раскладка дампа: {layout_path}")
+        png_path = os.path.join(output_dir, f"{name}_map.png")
+        if save_heatmap(entropy, fill, png_path):
+            print(f"[+] Тепловая карта: {png_path}")
+
+
+def classify(entropy, fill):
+    """Класс каждого блока: zero, erased, low, data, high"""
+    classes = np.full(len(entropy), 3, dtype=np.uint8)  # data
+    classes[entropy < LOW_ENTROPY] = 2
+    classes[entropy >= HIGH_ENTROPY] = 4
+    classes[fill == FILL_ZERO] = 0
+    classes[fill == FILL_ERASED] = 1
+    classes[np.isnan(entropy)] = 5  # не посчитано (поток прошёл мимо)
+    return classes
+
+
+CLASS_NAMES = ["zero", "erased", "low", "data", "high", "unknown"]
+
+
+def layout_report(entropy, fill, block_size=BLOCK_SIZE):
+    """Склеить соседние блоки одного класса в диапазоны"""
+    if not len(entropy):
+        return "(пусто)\n"
+    classes = classify(entropy, fill)
+    starts = np.flatnonzero(np.r_[True, classes[1:] != classes[:-1]])
+    ends = np.append(starts[1:], len(classes))
+    lines = [f"# блок {block_size} байт; энтропия в бит/байт", ""]
+    for start, end in zip(starts, ends):
+        mean = np.nanmean(entropy[start:end]) if classes[start] != 5 else float("nan")
+        lines.append(f"0x{start * block_size:010x}-0x{end * block_size - 1:010x}  "
+                     f"{CLASS_NAMES[classes[start]]:<7}  {mean:5.2f}")
+    counts = np.bincount(classes, minlength=len(CLASS_NAMES))
+    lines.append("")
+    lines.extend(f"{CLASS_NAMES[i]:<7} {counts[i] * block_size / (1024 * 1024):10.1f} МиБ"
+                 for i in range(len(CLASS_NAMES)) if counts[i])
+    return "\n".join(lines) + "\n"
+
+
+def save_heatmap(entropy, fill, png_path, width=REGION_BLOCKS):
+    """PNG: пиксель на блок, синий — низкая энтропия, красный — высокая,
+    чёрный — нули, белый — 0xFF. Нужен Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("[!] Pillow не установлен — тепловая карта не сохранена")
+        return False
+    if not len(entropy):
+        return False
+    rows = (len(entropy) + width - 1) // width
+    level = np.nan_to_num(entropy / 8.0, nan=0.0).clip(0.0, 1.0)
+    rgb = np.zeros((rows * width, 3), dtype=np.uint8)
+    rgb[:len(level), 0] = (255 * level).astype(np.uint8)
+    rgb[:len(level), 1] = (255 * (1.0 - np.abs(2.0 * level - 1.0))).astype(np.uint8)
+    rgb[:len(level), 2] = (255 * (1.0 - level)).astype(np.uint8)
+    rgb[:len(fill)][fill == FILL_ZERO] = (0, 0, 0)
+    rgb[:len(fill)][fill == FILL_ERASED] = (255, 255, 255)
+    rgb[len(level):] = (40, 40, 40)
+    Image.fromarray(rgb.reshape(rows, width, 3), "RGB").save(png_path)
+    return True
+
+
+# ─── Строгие проверки заголовков для высокоэнтропийных областей ─────────
+
+def _plausible_jpeg(head):
+    """Цепочка маркеров от SOI до SOS с корректными длинами сегментов"""
+    i = 2
+    for _ in range(64):
+        if i + 4 > len(head) or head[i] != 0xFF:
+            return False
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1  # байт-заполнитель
+            continue
+        if marker < 0xC0 or marker in (0xD8, 0xD9) or 0xD0 <= marker <= 0xD7:
+            return False
+        length = struct.unpack(">H", head[i + 2:i + 4])[0]
+        if length < 2:
+            return False
+        if marker == 0xDA:
+            return True
+        i += 2 + length
+    return False
+
+
+def _plausible_png(head):
+    """Первый чанк — IHDR длиной 13 с верным CRC"""
+    if len(head) < 33 or head[8:16] != b"\x00\x00\x00\x0dIHDR":
+        return False
+    crc = struct.unpack(">I", head[29:33])[0]
+    return zlib.crc32(head[12:29]) & 0xFFFFFFFF == crc
+
+
+def _plausible_bmp(head, available=None):
+    """Поля заголовка согласованы, файл помещается в оставшиеся данные.
+
+    available — сколько байт входа осталось от сигнатуры (None — неизвестно,
+    поток): bfSize больше этого значит обрезанную картинку или мусор.
+    """
+    if len(head) < 34:
+        return False
+    size, reserved, data_offset, dib_size = struct.unpack("<IIII", head[2:18])
+    if reserved != 0 or dib_size not in (12, 40, 52, 56, 108, 124):
+        return False
+    if available is not None and size > available:
+        return False
+    if not 14 + dib_size <= data_offset < size:
+        return False
+    if dib_size == 12:
+        width, height, planes, bpp = struct.unpack("<HHHH", head[18:26])
+        compression = 0
+    else:
+        width, height, planes, bpp, compression = struct.unpack("<iiHHI", head[18:34])
+    if width == 0 or height == 0 or planes != 1 or bpp not in (1, 4, 8, 16, 24, 32):
+        return False
+    if compression == 0:
+        # несжатые строки пикселей целиком должны лежать в пределах bfSize
+        stride = (abs(width) * bpp + 31) // 32 * 4
+        return data_offset + stride * abs(height) <= size
+    return True
+
+
+STRICT_HEAD = 64 * 1024  # сколько байт от сигнатуры нужно строгим проверкам
+
+
+def strict_check(extension, head, available=None):
+    """Строгая проверка заголовка изображения по первым байтам head.
+
+    available — сколько байт входа осталось от начала картинки, если известно.
+    """
+    if extension in (".jpg", ".jpeg"):
+        return _plausible_jpeg(head)
+    if extension == ".png":
+        return _plausible_png(head)
+    if extension == ".bmp":
+        return _plausible_bmp(head, available)
+    return True
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(f"Использование: python {sys.argv[0]} <дамп> <папка_вывода>")
+        sys.exit(1)
+    if np is None:
+        print("[-] Нужен NumPy: pkg install python-numpy")
+        sys.exit(1)
+
+    input_file, output_dir = sys.argv[1], sys.argv[2]
+    os.makedirs(output_dir, exist_ok=True)
+    src = open_source(input_file)
+    triage = Triage(src)
+    offset = 0
+    while not src.at_eof(offset):
+        triage.prepare(offset, offset + REGION_SIZE)
+        offset += REGION_SIZE
+        src.release(offset)
+    src.close()
+    triage.export(output_dir, os.path.basename(input_file) if input_file != "-" else "stdin")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""Фоновый сервис извлечения: один «тёплый» процесс вместо нового на каждую задачу.
+
+Демон слушает локальный сокет (Unix, а где его нет — 127.0.0.1) и
+принимает задачи в виде JSON-строк. Модули карверов импортируются один
+раз при запуске, недавно открытые входы остаются отображёнными в память
+(SourceCache), задачи выполняются в ограниченном пуле потоков. Вывод и
+смещение сканирования каждой задачи уходят клиенту построчно:
+
+    → {"cmd": "run", "tool": "multiextV2", "input": "...", "output": "...", "options": {...}}
+    ← {"event": "queued", "job": 1}
+    ← {"event": "started", "job": 1, "size": 536870912}
+    ← {"event": "log", "job": 1, "text": "Найдено изображение: .jpg @ 0x1000"}
+    ← {"event": "progress", "job": 1, "offset": 4194304, "size": 536870912}
+    ← {"event": "done", "job": 1, "code": 0}
+
+Остальные команды: ping, status, stop (поле job), shutdown. Одно
+соединение — один запрос. Коды завершения те же, что у скриптов, включая
+STOP_EXIT_CODE для остановленной задачи.
+
+    python extractd.py serve [--jobs N] [--cache N]
+    python extractd.py run multiextV2 dump.bin out [--resume] [-O triage=true]
+    python extractd.py status | stop <job> | shutdown
+"""
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import inspect
+import argparse
+import tempfile
+import importlib
+import itertools
+import threading
+import traceback
+import subprocess
+import contextvars
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from checkpoint import STOP_EXIT_CODE, job_stop_event, progress_hook
+from datasource import FileSource, source_cache, is_stream_path
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# инструмент -> (модуль, функция); функция принимает (вход, папка, **options)
+TOOLS = {
+    "multiext": ("multiext", "extract_jpg_with_names"),
+    "multiextV2": ("multiextV2", "extract_images"),
+    "paramext": ("paramext", "extract_param"),
+    "bootext": ("bootext", "extract_bootimg"),
+    "recext": ("recext", "extract_recovery"),
+}
+
+DEFAULT_PORT = 47731
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_CACHE = 4          # сколько входов держать отображёнными
+PROGRESS_INTERVAL = 0.25   # не чаще, секунд
+KEEP_FINISHED = 50         # сколько завершённых задач помнить для status
+
+
+def socket_path():
+    return os.environ.get("EXTRACTD_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"extractd-{os.getuid()}.sock")
+
+
+def use_unix_socket():
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+# ─── Клиент ─────────────────────────────────────────────────────────────
+
+def connect(timeout=1.0):
+    if use_unix_socket():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path())
+        except OSError:
+            sock.close()
+            raise
+    else:
+        port = int(os.environ.get("EXTRACTD_PORT", DEFAULT_PORT))
+        sock = socket.create_connection(("127.0.0.1", port), timeout)
+    sock.settimeout(None)
+    return sock
+
+
+def call(request, timeout=1.0):
+    """Отправить запрос и вернуть события ответа по мере поступления"""
+    sock = connect(timeout)
+    try:
+        sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+    finally:
+        sock.close()
+
+
+def is_running():
+    try:
+        return any(event.get("event") == "pong" for event in call({"cmd": "ping"}))
+    except (OSError, ValueError):
+        return False
+
+
+def start_daemon(workers=None, wait=5.0):
+    """Запустить демон отдельным процессом и дождаться, пока он ответит"""
+    cmd = [sys.executable or "python3", os.path.join(BASE_DIR, "extractd.py"), "serve"]
+    if workers:
+        cmd += ["--jobs", str(workers)]
+    subprocess.Popen(cmd, cwd=BASE_DIR, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if is_running():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def stop_job(job_id):
+    return list(call({"cmd": "stop", "job": job_id}))
+
+
+# ─── Демон ──────────────────────────────────────────────────────────────
+
+class _SharedSource:
+    """FileSource из кэша: close() только отпускает его"""
+
+    def __init__(self, cache, key, source):
+        self._cache = cache
+        self._key = key
+        self._source = source
+
+    def __getattr__(self, name):
+        return getattr(self._source, name)
+
+    def close(self):
+        if self._cache is not None:
+            self._cache.release(self._key)
+            self._cache = None
+
+
+class SourceCache:
+    """Недавно открытые файлы, отображённые в память (LRU).
+
+    Ключ включает размер и время изменения, так что изменённый файл
+    откроется заново. Файл закрывается, когда он вытеснен и ни одна задача
+    его не использует.
+    """
+
+    def __init__(self, capacity=DEFAULT_CACHE):
+        self.capacity = capacity
+        self._entries = OrderedDict()  # ключ -> [FileSource, число пользователей]
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        st = os.stat(path)
+        key = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [FileSource(path), 0]
+            self._entries.move_to_end(key)
+            entry[1] += 1
+            self._evict()
+        return _SharedSource(self, key, entry[0])
+
+    def release(self, key):
+        with self._lock:
+            self._entries[key][1] -= 1
+            self._evict()
+
+    def _evict(self):
+        for key in list(self._entries):
+            if len(self._entries) <= self.capacity:
+                break
+            source, users = self._entries[key]
+            if users == 0:
+                source.close()
+                del self._entries[key]
+
+    def close(self):
+        with self._lock:
+            for source, _ in self._entries.values():
+                source.close()
+            self._entries.clear()
+
+
+# задача, которой принадлежит текущий поток (для перенаправления print)
+_job_output = contextvars.ContextVar("job_output", default=None)
+
+
+class _RoutedStdout:
+    """sys.stdout демона: вывод задачи уходит её клиентам, остальное — как обычно"""
+
+    def __init__(self, real):
+        self._real = real
+
+    def write(self, text):
+        job = _job_output.get()
+        if job is None:
+            return self._real.write(text)
+        job.write(text)
+        return len(text)
+
+    def flush(self):
+        if _job_output.get() is None:
+            self._real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+class Job:
+    def __init__(self, job_id, tool, input_file, output_dir, options):
+        self.id = job_id
+        self.tool = tool
+        self.input = input_file
+        self.output = output_dir
+        self.options = options
+        self.state = "queued"
+        self.code = None
+        self.offset = 0
+        self.size = None if is_stream_path(input_file) else os.path.getsize(input_file)
+        self.stop_event = threading.Event()
+        self.finished = threading.Event()
+        self._clients = []
+        self._send_lock = threading.Lock()
+        self._line_lock = threading.Lock()
+        self._line = ""
+        self._last_progress = 0.0
+
+    def attach(self, send):
+        with self._send_lock:
+            self._clients.append(send)
+
+    def send(self, event):
+        event["job"] = self.id
+        with self._send_lock:
+            for send in list(self._clients):
+                try:
+                    send(event)
+                except OSError:
+                    self._clients.remove(send)  # клиент отключился, задача продолжается
+
+    def write(self, text):
+        with self._line_lock:
+            lines = (self._line + text).split("\n")
+            self._line = lines.pop()
+        for line in lines:
+            self.send({"event": "log", "text": line.rstrip("\r")})
+
+    def progress(self, offset):
+        self.offset = offset if self.size is None else min(offset, self.size)
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.send({"event": "progress", "offset": self.offset, "size": self.size})
+
+    def finish(self, code):
+        if self._line:
+            self.write("\n")
+        self.code = code
+        self.state = "done" if code == 0 else "stopped" if code == STOP_EXIT_CODE else "failed"
+        self.send({"event": "done", "code": code})
+        self.finished.set()
+
+    def info(self):
+        return {"job": self.id, "tool": self.tool, "input": self.input, "output": self.output,
+                "state": self.state, "offset": self.offset, "size": self.size, "code": self.code}
+
+
+class Daemon:
+    def __init__(self, workers=DEFAULT_WORKERS, cache_size=DEFAULT_CACHE):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.cache = SourceCache(cache_size)
+        self.jobs = OrderedDict()
+        self.functions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # модули карверов грузятся один раз — в этом и смысл демона
+        for tool, (module, name) in TOOLS.items():
+            try:
+                self.functions[tool] = getattr(importlib.import_module(module), name)
+            except Exception as e:
+                print(f"[!] {tool} недоступен: {e}")
+
+    def submit(self, tool, input_file, output_dir, options):
+        fn = self.functions.get(tool)
+        if fn is None:
+            raise ValueError(f"неизвестный инструмент: {tool}")
+        if not input_file or not output_dir:
+            raise ValueError("нужны input и output")
+        if not os.path.exists(input_file):
+            raise ValueError(f"файл не найден: {input_file}")
+        allowed = list(inspect.signature(fn).parameters)[2:]
+        unknown = set(options) - set(allowed)
+        if unknown:
+            raise ValueError(f"{tool} не принимает {', '.join(sorted(unknown))}; "
+                             f"допустимо: {', '.join(allowed)}")
+        with self._lock:
+            job = Job(next(self._ids), tool, input_file, output_dir, options)
+            self.jobs[job.id] = job
+            done = [j for j in self.jobs.values() if j.finished.is_set()]
+            for old in done[:max(0, len(done) - KEEP_FINISHED)]:
+                del self.jobs[old.id]
+        return job
+
+    def start(self, job):
+        self.pool.submit(contextvars.copy_context().run, self._run, job)
+
+    def _run(self, job):
+        if job.stop_event.is_set():
+            job.finish(STOP_EXIT_CODE)  # отменена, не успев начаться
+            return
+        job.state = "running"
+        job.send({"event": "started", "size": job.size})
+        # всё, что карвер делает в этом контексте, относится к задаче
+        _job_output.set(job)
+        source_cache.set(self.cache)
+        job_stop_event.set(job.stop_event)
+        progress_hook.set(job.progress)
+        try:
+            result = self.functions[job.tool](job.input, job.output, **job.options)
+            code = 1 if result is False else 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            job.write(traceback.format_exc())
+            code = 1
+        job.finish(code)
+
+    def stop(self, job_id=None):
+        with self._lock:
+            jobs = list(self.jobs.values()) if job_id is None else [self.jobs.get(job_id)]
+        for job in jobs:
+            if job is not None:
+                job.stop_event.set()
+        return any(job is not None for job in jobs)
+
+    def status(self):
+        with self._lock:
+            return [job.info() for job in self.jobs.values()]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def send(self, event):
+        self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self):
+        daemon = self.server.extractor
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            self.send({"event": "error", "message": "ожидалась JSON-строка"})
+            return
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            self.send({"event": "pong", "pid": os.getpid(), "tools": sorted(daemon.functions)})
+        elif cmd == "status":
+            self.send({"event": "status", "jobs": daemon.status()})
+        elif cmd == "stop":
+            found = daemon.stop(request.get("job"))
+            self.send({"event": "ok"} if found else {"event": "error", "message": "нет такой задачи"})
+        elif cmd == "shutdown":
+            self.send({"event": "ok"})
+            daemon.stop()
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif cmd == "run":
+            try:
+                job = daemon.submit(request.get("tool"), request.get("input"),
+                                    request.get("output"), request.get("options") or {})
+            except ValueError as e:
+                self.send({"event": "error", "message": str(e)})
+                return
+            job.attach(self.send)
+            job.send({"event": "queued"})
+            daemon.start(job)
+            job.finished.wait()
+        else:
+            self.send({"event": "error", "message": f"неизвестная команда: {cmd}"})
+
+
+if use_unix_socket():
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    class _Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+
+def serve(workers=DEFAULT_WORKERS, cache_size=DEFAULT_CACHE):
+    if is_running():
+        print("[-] Демон уже запущен")
+        return 1
+    if use_unix_socket():
+        address = socket_path()
+        if os.path.exists(address):
+            os.remove(address)  # сокет от упавшего демона
+    else:
+        address = ("127.0.0.1", int(os.environ.get("EXTRACTD_PORT", DEFAULT_PORT)))
+
+    sys.stdout = _RoutedStdout(sys.stdout)
+    daemon = Daemon(workers, cache_size)
+    server = _Server(address, _Handler)
+    server.extractor = daemon
+    if use_unix_socket():
+        os.chmod(address, 0o600)  # задачи пишут файлы от имени пользователя
+
+    def _terminate(signum, frame):
+        daemon.stop()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, _terminate)
+
+    print(f"[+] extractd слушает {address}, потоков: {workers}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+    server.server_close()
+    daemon.pool.shutdown(wait=True)
+    daemon.cache.close()
+    if use_unix_socket():
+        try:
+            os.remove(address)
+        except FileNotFoundError:
+            pass
+    print("[+] extractd остановлен", flush=True)
+    return 0
+
+
+# ─── Тонкий клиент командной строки ─────────────────────────────────────
+
+def _option(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("ожидалось имя=значение")
+    try:
+        return key.replace("-", "_"), json.loads(value)
+    except ValueError:
+        return key.replace("-", "_"), value
+
+
+def run_client(tool, input_file, output_dir, options, autostart=True):
+    if not is_running():
+        if not autostart or not start_daemon():
+            print("[-] Демон не запущен: python extractd.py serve")
+            return 1
+    # у демона своя рабочая папка, поэтому пути — абсолютные
+    if options.get("catalog"):
+        options["catalog"] = os.path.abspath(options["catalog"])
+    request = {"cmd": "run", "tool": tool, "input": os.path.abspath(input_file),
+               "output": os.path.abspath(output_dir), "options": options}
+    sock = connect()
+    sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+    f = sock.makefile("r", encoding="utf-8")
+    show_progress = sys.stderr.isatty()
+    job_id = None
+    code = 1
+    while True:
+        try:
+            line = f.readline()
+        except KeyboardInterrupt:
+            # Ctrl+C — попросить демон остановить задачу чисто и дождаться ответа
+            if job_id is not None:
+                print("\n[!] Останавливаю задачу...")
+                stop_job(job_id)
+            continue
+        if not line:
+            break
+        event = json.loads(line)
+        kind = event.get("event")
+        if kind == "queued":
+            job_id = event["job"]
+        elif kind == "log":
+            if show_progress:
+                sys.stderr.write("\r\033[K")
+            print(event["text"], flush=True)
+        elif kind == "progress" and show_progress and event.get("size"):
+            sys.stderr.write(f"\r[{100 * event['offset'] // event['size']:3d}%] 0x{event['offset']:x}")
+            sys.stderr.flush()
+        elif kind == "error":
+            print(f"[-] {event['message']}")
+        elif kind == "done":
+            code = event["code"]
+    if show_progress:
+        sys.stderr.write("\r\033[K")
+    f.close()
+    sock.close()
+    return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Фоновый сервис извлечения и клиент к нему")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve", help="запустить демон")
+    p_serve.add_argument("--jobs", type=int, default=DEFAULT_WORKERS,
+                         help=f"сколько задач выполнять одновременно (по умолчанию {DEFAULT_WORKERS})")
+    p_serve.add_argument("--cache", type=int, default=DEFAULT_CACHE,
+                         help="сколько входных файлов держать открытыми")
+
+    p_run = sub.add_parser("run", help="выполнить задачу в демоне")
+    p_run.add_argument("tool", choices=sorted(TOOLS))
+    p_run.add_argument("input_file")
+    p_run.add_argument("output_dir")
+    p_run.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    p_run.add_argument("-O", "--option", type=_option, action="append", default=[],
+                       help="параметр функции карвера, например -O triage=true -O max_depth=3")
+    p_run.add_argument("--no-start", action="store_true", help="не запускать демон, если его нет")
+
+    sub.add_parser("status", help="список задач")
+    p_stop = sub.add_parser("stop", help="остановить задачу")
+    p_stop.add_argument("job", type=int)
+    sub.add_parser("shutdown", help="остановить демон")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        sys.exit(serve(args.jobs, args.cache))
+    if args.cmd == "run":
+        options = dict(args.option)
+        if args.resume:
+            options["resume"] = True
+        sys.exit(run_client(args.tool, args.input_file, args.output_dir, options,
+                            autostart=not args.no_start))
+
+    request = {"cmd": args.cmd}
+    if args.cmd == "stop":
+        request["job"] = args.job
+    try:
+        events = list(call(request))
+    except OSError:
+        print("[-] Демон не запущен")
+        sys.exit(1)
+    for event in events:
+        if event.get("event") == "status":
+            for job in event["jobs"]:
+                done = f"{100 * job['offset'] // job['size']:3d}%" if job.get("size") else "   -"
+                print(f"{job['job']:4d}  {job['state']:<8} {done}  {job['tool']:<10} {job['input']} → {job['output']}")
+        elif event.get("event") == "error":
+            print(f"[-] {event['message']}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,201 @@
 #!/data/data/com.termux/files/usr/bin/env python3
+"""Установка зависимостей (рассчитано на Termux).
+
+Сначала проверяется, что уже есть: утилиты — поиском в PATH, модули
+Python — через importlib, без запуска pip и pkg; это доли секунды.
+Ставится только недостающее: пакеты Termux одной командой pkg install
+(apt держит блокировку, параллельно его не запустить), модули без
+пакета в Termux — одной командой pip. Эти две ветки идут параллельно.
+
+Время последнего обновления индекса пакетов лежит в STATE_FILE: индекс
+обновляется не чаще раза в сутки, поэтому повторный запуск, когда всё уже
+стоит, занимает секунды. Что установлено, каждый раз проверяется заново —
+проверка дешевле, чем риск поверить устаревшей записи.
+
+    python installer.py            установить недостающее
+    python installer.py --check    только показать, чего не хватает
+    python installer.py --refresh  обновить индекс пакетов принудительно
+"""
 import os
-import subprocess
 import sys
+import json
 import time
+import shutil
+import argparse
+import threading
+import subprocess
+import importlib.util
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+PREFIX = os.environ.get("PREFIX", "/data/data/com.termux/files/usr")
+IS_TERMUX = "com.termux" in PREFIX and shutil.which("pkg") is not None
+STATE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "extractor-installer.json")
+INDEX_MAX_AGE = 24 * 3600  # индекс пакетов моложе суток не обновляем
+
+# kind — "tool" (ищем probe в PATH) или "module" (ищем probe импортом);
+# pkg — пакет Termux, pip — пакет pip, если пакета Termux нет или это не
+# Termux; x11 — пакет лежит в x11-repo
+Dependency = namedtuple("Dependency", "name kind probe pkg pip x11")
+
+DEPENDENCIES = [
+    Dependency("abootimg", "tool", "abootimg", "abootimg", None, False),
+    Dependency("gzip", "tool", "gunzip", "gzip", None, False),
+    Dependency("lz4", "tool", "lz4", "lz4", None, False),
+    Dependency("cpio", "tool", "cpio", "cpio", None, False),
+    Dependency("file", "tool", "file", "file", None, False),
+    Dependency("p7zip", "tool", "7z", "p7zip", None, False),
+    Dependency("termux-x11", "tool", "termux-x11", "termux-x11", None, True),
+    Dependency("PyQt5", "module", "PyQt5.QtWidgets", "python-pyqt5", "PyQt5", True),
+    # сам пакет tkinter есть всегда, без _tkinter он не работает
+    Dependency("tkinter", "module", "_tkinter", "python-tkinter", None, True),
+    # Pillow и numpy в Termux собраны заранее: pip собирал бы их из исходников
+    Dependency("Pillow", "module", "PIL", "python-pillow", "pillow", False),
+    Dependency("numpy", "module", "numpy", "python-numpy", "numpy", False),
+    Dependency("lz4 (python)", "module", "lz4.frame", None, "lz4", False),
+]
+
+_print_lock = threading.Lock()
+
+
+def say(text):
+    with _print_lock:
+        print(text, flush=True)
+
 
 # ─── Удобная функция для выполнения команд ─────────────────────────────
-def run(cmd, fatal=True):
-    print(f"\n>>> Выполняем: {cmd}")
-    result = subprocess.run(cmd, shell=True)
-    if fatal and result.returncode != 0:
-        print(f"Ошибка при выполнении: {cmd}")
-        sys.exit(1)
-    return result.returncode
+def run(cmd, tag):
+    """Выполнить команду, вывод построчно с меткой ветки; возвращает код выхода"""
+    say(f"\n>>> [{tag}] Выполняем: {cmd}")
+    proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, errors="replace")
+    for line in proc.stdout:
+        say(f"[{tag}] {line.rstrip()}")
+    code = proc.wait()
+    if code != 0:
+        say(f"[{tag}] Ошибка при выполнении: {cmd}")
+    return code
+
+
+# ─── Проверка того, что уже установлено ─────────────────────────────
+def is_present(dep):
+    if dep.kind == "tool":
+        return shutil.which(dep.probe) is not None
+    try:
+        return importlib.util.find_spec(dep.probe) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def probe_all():
+    importlib.invalidate_caches()  # после pip install в этом же процессе
+    return {dep.name: is_present(dep) for dep in DEPENDENCIES}
+
+
+def x11_repo_enabled():
+    return os.path.exists(os.path.join(PREFIX, "etc", "apt", "sources.list.d", "x11.list"))
+
+
+# ─── Файл состояния ─────────────────────────────
+def load_state():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+# ─── Установка ─────────────────────────────
+def plan(present):
+    """Разложить недостающее по веткам: pkg, pip и то, что поставить нельзя"""
+    packages, modules, manual = [], [], []
+    for dep in DEPENDENCIES:
+        if present[dep.name]:
+            continue
+        if IS_TERMUX and dep.pkg:
+            packages.append(dep)
+        elif dep.pip:
+            modules.append(dep)
+        else:
+            manual.append(dep)
+    return packages, modules, manual
+
+
+def update_index(state):
+    if run("apt-get update", "pkg") != 0:
+        return False
+    state["index_updated"] = time.time()
+    return True
+
+
+def install_packages(deps, state, refresh):
+    """Ветка pkg: x11-repo при необходимости, индекс, затем один pkg install"""
+    updated = False
+    if any(dep.x11 for dep in deps) and not x11_repo_enabled():
+        if run("pkg install -y x11-repo", "pkg") != 0:
+            return False
+        refresh = True  # индекс нового репозитория ещё не скачан
+    if refresh or time.time() - state.get("index_updated", 0) > INDEX_MAX_AGE:
+        updated = update_index(state)
+
+    cmd = "pkg install -y " + " ".join(dep.pkg for dep in deps)
+    if run(cmd, "pkg") == 0:
+        return True
+    # частая причина — устаревший индекс (404 на старые версии пакетов)
+    if not updated and update_index(state):
+        return run(cmd, "pkg") == 0
+    return False
+
+
+def install_modules(deps):
+    """Ветка pip: один вызов на все модули, без переустановки уже стоящего"""
+    names = " ".join(dep.pip for dep in deps)
+    return run(f'"{sys.executable}" -m pip install {names}', "pip") == 0
+
+
+def install_all(refresh=False):
+    state = load_state()
+    present = probe_all()
+    packages, modules, manual = plan(present)
+
+    if packages or modules:
+        print("\n⚙ Устанавливаем недостающее: " + ", ".join(dep.name for dep in packages + modules))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = []
+            if packages:
+                futures.append(pool.submit(install_packages, packages, state, refresh))
+            if modules:
+                futures.append(pool.submit(install_modules, modules))
+            for future in futures:
+                future.result()
+        present = probe_all()
+    elif refresh and IS_TERMUX:
+        update_index(state)
+
+    # в состоянии только время обновления индекса; старые поля не тащим
+    save_state({"index_updated": state["index_updated"]} if "index_updated" in state else {})
+
+    report(present)
+    for dep in manual:
+        if not present[dep.name]:
+            print(f"   {dep.name}: поставьте вручную" + (f" (в Termux: pkg install {dep.pkg})" if dep.pkg else ""))
+    return all(present.values())
+
+
+def report(present):
+    print("\nЗависимости:")
+    for dep in DEPENDENCIES:
+        print(f"  {'✅' if present[dep.name] else '❌'} {dep.name}")
+
 
 # ─── Проверяем, установлен ли tkinter ─────────────────────────────
 def check_tkinter():
@@ -24,17 +208,6 @@ def check_tkinter():
         print("❌ Tkinter не найден или не работает:", e)
         return False
 
-# ─── Основная установка ─────────────────────────────
-def install_all():
-    run("pkg update -y && pkg upgrade -y")
-    run("pkg install x11-repo -y")
-    run("pkg install termux-x11 -y")
-    run("pkg install PyQt5")
-    run("python -m pip install --upgrade pip setuptools wheel")
-    run("python -m pip install --no-cache-dir --force-reinstall pillow")
-run("pkg install abootimg")
-run("pkg install gzip")
-run("pkg install p7zip")
 
 # ─── Настройка DISPLAY и запуск X11 ─────────────────────────────
 def start_x11():
@@ -43,6 +216,7 @@ def start_x11():
     subprocess.Popen("termux-x11 :0 &", shell=True)
     time.sleep(2)
 
+
 # ─── Окно с изображением ─────────────────────────────
 def show_image(img_path):
     from tkinter import Tk, Label
@@ -62,17 +236,28 @@ def show_image(img_path):
     label.pack(expand=True)
     root.mainloop()
 
+
 # ─── Главный запуск ─────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Установка зависимостей экстракторов")
+    parser.add_argument("--check", action="store_true", help="только проверить, ничего не ставить")
+    parser.add_argument("--refresh", action="store_true", help="обновить индекс пакетов, даже если он свежий")
+    args = parser.parse_args()
+
+    if args.check:
+        present = probe_all()
+        report(present)
+        sys.exit(0 if all(present.values()) else 1)
+
+    install_all(refresh=args.refresh)
+
     if not check_tkinter():
-        print("\n⚙ Устанавливаем зависимости...")
-        install_all()
-        if not check_tkinter():
-            print("❌ Tkinter всё ещё не установлен. Попробуй вручную:")
-            print("   pkg install python-tkinter -y")
-            sys.exit(1)
+        print("❌ Tkinter всё ещё не установлен. Попробуй вручную:")
+        print("   pkg install python-tkinter -y")
+        sys.exit(1)
 
-    start_x11()
+    if IS_TERMUX:
+        start_x11()
 
     IMG_PATH = "/sdcard/test_image.jpg"
-    show_image(IMG_PATH)
\ No newline at end of file
+    show_image(IMG_PATH)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Декодеры «сырых» загрузочных логотипов в PNG.
+
+  * Qualcomm splash.img — заголовок SPLASH!! на 512 байт, затем BGR888
+    как есть (type 0) или сжатый RLE24 (type 1);
+  * MTK logo.bin — заголовок раздела с магией 0x58881688, таблица
+    смещений и картинки, сжатые zlib (обычно BGRA8888 или RGB565);
+  * сырой фреймбуфер без заголовка — размер и формат задаёт пользователь.
+
+Преобразование пикселей и раскрытие RLE делаются векторно на NumPy:
+разбор управляющих байтов RLE идёт по сериям, а не по пикселям.
+"""
+import os
+import sys
+import zlib
+import struct
+import argparse
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: без него логотипы не декодируются
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SPLASH_MAGIC = b"SPLASH!!"
+MTK_MAGIC = b"\x88\x16\x88\x58"
+HEADER_SIZE = 512
+MAX_SIDE = 8192
+MTK_MAX_ENTRIES = 1024
+# Заголовок и таблица MTK целиком: по ним карвер решает, сколько читать
+LOGO_HEAD = HEADER_SIZE + 8 + 4 * MTK_MAX_ENTRIES
+MAX_LOGO_SIZE = 64 * 1024 * 1024  # больше логотипов не бывает: иначе это не логотип
+
+# Сигнатуры для карвера: (магия, формат)
+LOGO_FORMATS = [
+    (SPLASH_MAGIC, "splash"),
+    (MTK_MAGIC, "mtk"),
+]
+
+# Формат пикселя -> (байт на пиксель, порядок каналов в памяти)
+PIXEL_FORMATS = {
+    "rgb565": (2, None),
+    "bgr565": (2, None),
+    "rgb888": (3, "RGB"),
+    "bgr888": (3, "BGR"),
+    "rgba8888": (4, "RGBA"),
+    "bgra8888": (4, "BGRA"),
+    "rgbx8888": (4, "RGBX"),
+    "bgrx8888": (4, "BGRX"),
+}
+
+# Разрешения экранов (портрет) для угадывания размеров картинок MTK
+COMMON_SCREENS = [
+    (1080, 1920), (1080, 2160), (1080, 2340), (1080, 2400), (1080, 2408), (1440, 2560),
+    (1440, 3200), (720, 1280), (720, 1440), (720, 1520), (720, 1600), (1200, 1920),
+    (800, 1280), (600, 1024), (540, 960), (480, 854), (480, 800), (320, 480), (240, 320),
+]
+COMMON_WIDTHS = [1440, 1200, 1080, 800, 768, 720, 640, 600, 540, 480, 360, 320, 240]
+
+
+def available():
+    return np is not None and Image is not None
+
+
+def decode_pixels(data, width, height, fmt):
+    """Байты фреймбуфера -> массив HxWx3 (или HxWx4 с альфой) в RGB"""
+    bpp, order = PIXEL_FORMATS[fmt]
+    need = width * height * bpp
+    if len(data) < need:
+        raise ValueError(f"мало данных: {len(data)} < {need}")
+    if bpp == 2:
+        px = np.frombuffer(data, dtype="<u2", count=width * height).reshape(height, width)
+        hi = ((px >> 11) & 0x1F).astype(np.uint16)
+        mid = ((px >> 5) & 0x3F).astype(np.uint16)
+        lo = (px & 0x1F).astype(np.uint16)
+        # растянуть 5/6 бит до 8 с повтором старших битов
+        hi = ((hi << 3) | (hi >> 2)).astype(np.uint8)
+        mid = ((mid << 2) | (mid >> 4)).astype(np.uint8)
+        lo = ((lo << 3) | (lo >> 2)).astype(np.uint8)
+        channels = (hi, mid, lo) if fmt == "rgb565" else (lo, mid, hi)
+        return np.dstack(channels)
+    px = np.frombuffer(data, dtype=np.uint8, count=need).reshape(height, width, bpp)
+    rgb = px[..., [order.index("R"), order.index("G"), order.index("B")]]
+    if "A" in order:
+        return np.dstack((rgb, px[..., order.index("A")]))
+    return rgb
+
+
+def expand_rle24(data, npixels):
+    """Раскрыть RLE24 Qualcomm в массив (npixels, 3) байтов как на диске.
+
+    Управляющий байт c: c & 0x80 — повтор следующего пикселя (c & 0x7F) + 1
+    раз, иначе далее идут c + 1 пикселей подряд. Разбор идёт по сериям,
+    само раскрытие — np.repeat + np.cumsum по шагам и одна выборка.
+    """
+    # позиции управляющих байтов: единственный цикл, по одному шагу на серию
+    controls = []
+    p = 0
+    total = 0
+    end = len(data)
+    while p < end and total < npixels:
+        c = data[p]
+        controls.append(p)
+        if c & 0x80:
+            total += c - 0x7F
+            p += 4
+        else:
+            total += c + 1
+            p += 4 + 3 * c
+    if p > end:
+        raise ValueError("RLE24 обрывается на середине серии")
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    # int32 вдвое дешевле int64, а сжатое тело splash не бывает больше 2 ГиБ
+    controls = np.asarray(controls, dtype=np.int32)
+    ctrl = buf[controls]
+    counts = (ctrl & 0x7F).astype(np.int32) + 1
+    starts = controls + 1
+    # шаг смещения между соседними пикселями: 3 внутри литеральной серии,
+    # 0 внутри повтора, прыжок к данным серии на её первом пикселе
+    inc = np.where(ctrl >= 0x80, 0, 3).astype(np.int32)
+    first = np.cumsum(counts) - counts
+    step = np.repeat(inc, counts)
+    step[0] = starts[0]
+    step[first[1:]] = starts[1:] - (starts[:-1] + (counts[:-1] - 1) * inc[:-1])
+    offsets = np.cumsum(step, dtype=np.int32)
+    if len(offsets) < npixels:
+        raise ValueError(f"RLE24 даёт {len(offsets)} пикселей вместо {npixels}")
+
+    # пиксель читается одним uint32 с любого байтового смещения
+    padded = np.zeros(len(buf) + 4, dtype=np.uint8)
+    padded[:len(buf)] = buf
+    words = np.ndarray(shape=(len(buf),), dtype="<u4", buffer=padded, strides=(1,))
+    pixels = words[offsets[:npixels]].view(np.uint8).reshape(-1, 4)
+    return pixels[:, :3]
+
+
+def parse_splash_header(header):
+    """(ширина, высота, тип, размер данных) или None, если это не splash"""
+    if len(header) < 24 or header[:8] != SPLASH_MAGIC:
+        return None
+    width, height, img_type, blocks = struct.unpack("<IIII", header[8:24])
+    if not (0 < width <= MAX_SIDE and 0 < height <= MAX_SIDE) or img_type not in (0, 1):
+        return None
+    size = blocks * 512
+    if img_type == 0 and size < width * height * 3:
+        return None
+    return width, height, img_type, size
+
+
+def decode_splash(data):
+    """splash.img (с заголовком) -> массив HxWx3 RGB"""
+    header = parse_splash_header(data[:HEADER_SIZE])
+    if header is None:
+        raise ValueError("нет заголовка SPLASH!!")
+    width, height, img_type, size = header
+    body = data[HEADER_SIZE:HEADER_SIZE + size]
+    if img_type == 1:
+        bgr = expand_rle24(body, width * height).reshape(height, width, 3)
+        return bgr[..., ::-1]
+    return decode_pixels(body, width, height, "bgr888")
+
+
+def parse_mtk_logo(data):
+    """Таблица MTK logo.bin: список (смещение, размер) сжатых картинок"""
+    if len(data) < HEADER_SIZE + 8 or data[:4] != MTK_MAGIC:
+        return None
+    part_size = struct.unpack("<I", data[4:8])[0]
+    table = HEADER_SIZE
+    count, bloc_size = struct.unpack("<II", data[table:table + 8])
+    if not 0 < count <= MTK_MAX_ENTRIES or bloc_size > part_size or len(data) < table + 8 + 4 * count:
+        return None
+    offsets = list(struct.unpack(f"<{count}I", data[table + 8:table + 8 + 4 * count]))
+    ends = offsets[1:] + [bloc_size]
+    entries = []
+    for start, end in zip(offsets, ends):
+        if not start < end <= bloc_size:
+            return None
+        entries.append((table + start, end - start))
+    return entries
+
+
+def guess_size(nbytes, bpp, width=None):
+    """Подобрать (ширина, высота) по размеру распакованной картинки"""
+    pixels, rest = divmod(nbytes, bpp)
+    if rest:
+        return None
+    if not width:
+        # сначала точные разрешения экранов (логотип во весь экран)
+        for w, h in COMMON_SCREENS:
+            if w * h == pixels:
+                return w, h
+    for w in ([width] if width else COMMON_WIDTHS):
+        if pixels % w == 0 and (width or 0.5 <= (pixels // w) / w <= 3.0):
+            return w, pixels // w
+    return None
+
+
+def decode_mtk_logo(data, fmt="bgra8888", width=None):
+    """Распаковать картинки MTK logo.bin.
+
+    Возвращает список (номер, массив пикселей или None, сырые байты);
+    None — размер угадать не удалось, сохраняются сырые байты.
+    """
+    entries = parse_mtk_logo(data)
+    if entries is None:
+        raise ValueError("нет таблицы MTK logo")
+    bpp = PIXEL_FORMATS[fmt][0]
+    images = []
+    for index, (start, size) in enumerate(entries):
+        raw = zlib.decompress(data[start:start + size])
+        dims = guess_size(len(raw), bpp, width)
+        pixels = decode_pixels(raw, dims[0], dims[1], fmt) if dims else None
+        images.append((index, pixels, raw))
+    return images
+
+
+def save_png(pixels, path):
+    mode = "RGBA" if pixels.shape[2] == 4 else "RGB"
+    Image.fromarray(np.ascontiguousarray(pixels), mode).save(path)
+
+
+def logo_size(fmt, head):
+    """Полный размер логотипа по его заголовку (для карвера) или None.
+
+    head — первые LOGO_HEAD байт. Для MTK таблица разбирается сразу:
+    магия 88 16 88 58 — общий заголовок разделов MTK (lk, boot и т.п.),
+    поэтому без правильной таблицы находка не считается логотипом, а
+    размер берётся из bloc_size, а не из размера раздела.
+    """
+    if fmt == "splash":
+        header = parse_splash_header(head)
+        size = None if header is None else HEADER_SIZE + header[3]
+    elif parse_mtk_logo(head) is None:
+        return None
+    else:
+        size = HEADER_SIZE + struct.unpack("<I", head[HEADER_SIZE + 4:HEADER_SIZE + 8])[0]
+    if size is None or size > MAX_LOGO_SIZE:
+        return None
+    return size
+
+
+def carve_logo(fmt, data, output_dir, pos):
+    """Декодировать логотип, найденный карвером по смещению pos.
+
+    Пишет PNG рядом с остальными картинками и возвращает их имена.
+    """
+    written = []
+    if fmt == "splash":
+        name = f"splash_0x{pos:08x}.png"
+        save_png(decode_splash(data), os.path.join(output_dir, name))
+        written.append(name)
+    else:
+        for index, pixels, raw in decode_mtk_logo(data):
+            if pixels is None:
+                name = f"mtklogo_0x{pos:08x}_{index:03d}.raw"
+                with open(os.path.join(output_dir, name), "wb") as f:
+                    f.write(raw)
+            else:
+                name = f"mtklogo_0x{pos:08x}_{index:03d}.png"
+                save_png(pixels, os.path.join(output_dir, name))
+            written.append(name)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Декодирование загрузочных логотипов в PNG")
+    parser.add_argument("format", choices=["splash", "mtk", "raw"])
+    parser.add_argument("input_file")
+    parser.add_argument("output_dir")
+    parser.add_argument("--width", type=int, help="ширина (raw; для mtk — вместо угадывания)")
+    parser.add_argument("--height", type=int, help="высота (raw)")
+    parser.add_argument("--pixel-format", default=None, choices=sorted(PIXEL_FORMATS),
+                        help="формат пикселя (raw: rgba8888, mtk: bgra8888 по умолчанию)")
+    parser.add_argument("--offset", type=lambda v: int(v, 0), default=0,
+                        help="смещение начала данных во входном файле")
+    args = parser.parse_args()
+
+    if not available():
+        print("[-] Нужны NumPy и Pillow: pkg install python-numpy python-pillow")
+        sys.exit(1)
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(args.input_file, "rb") as f:
+        f.seek(args.offset)
+        data = f.read()
+
+    base = os.path.splitext(os.path.basename(args.input_file))[0]
+    if args.format == "splash":
+        written = carve_logo("splash", data, args.output_dir, args.offset)
+    elif args.format == "mtk":
+        written = []
+        for index, pixels, raw in decode_mtk_logo(data, args.pixel_format or "bgra8888", args.width):
+            if pixels is None:
+                name = f"{base}_{index:03d}.raw"
+                with open(os.path.join(args.output_dir, name), "wb") as f:
+                    f.write(raw)
+                print(f"[!] {name}: размер не угадан ({len(raw)} байт) — укажите --width")
+            else:
+                name = f"{base}_{index:03d}.png"
+                save_png(pixels, os.path.join(args.output_dir, name))
+            written.append(name)
+    else:
+        if not args.width or not args.height:
+            print("[-] Для raw нужны --width и --height")
+            sys.exit(1)
+        pixels = decode_pixels(data, args.width, args.height, args.pixel_format or "rgba8888")
+        written = [f"{base}.png"]
+        save_png(pixels, os.path.join(args.output_dir, written[0]))
+
+    for name in written:
+        print(f"[+] {os.path.join(args.output_dir, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,47 +3,123 @@ import os
 import sys
 import re
 
-def extract_jpg_with_names(file_path, output_dir):
+from catalog import open_catalog, pop_catalog_arg
+from checkpoint import Checkpoint, install_stop_handler
+from datasource import open_source, DEFAULT_WINDOW
+from entropy import Triage, strict_check, STRICT_HEAD, REGION_SIZE, np
+
+NAME_LOOKBEHIND = 200  # сколько байт до SOI просматривать в поисках имени
+SCAN_WINDOW = 4 * 1024 * 1024  # SOI ищем окнами, чтобы между ними проверять остановку
+
+def extract_jpg_with_names(file_path, output_dir, resume=False, window=DEFAULT_WINDOW, triage=False,
+                           catalog=None):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    with open(file_path, "rb") as f:
-        data = f.read()
+    src = open_source(file_path, lookbehind=NAME_LOOKBEHIND, window=window)
+
+    entropy_map = None
+    if triage:
+        if np is None:
+            print("[!] NumPy is not installed, entropy triage disabled")
+        else:
+            entropy_map = Triage(src)
 
+    cp = Checkpoint(output_dir, file_path, "multiext", resumable=src.seekable)
+    install_stop_handler(cp)
+    recorder = open_catalog(catalog, file_path)
     count = 0
     i = 0
-    while i < len(data):
-        if data[i:i+2] == b'\xFF\xD8':  # JPEG SOI
-            # Попытка найти имя файла рядом с изображением
-            # Ищем ASCII-строку оканчивающуюся на ".jpg" в 200 байтах до SOI
-            name_match = re.search(rb'([A-Za-z0-9_\-]+\.jpg)', data[max(0,i-200):i])
-            if name_match:
-                filename = name_match.group(1).decode(errors='ignore')
-            else:
-                filename = f'image_{count}.jpg'
-
-            end = data.find(b'\xFF\xD9', i)
-            if end != -1:
-                jpg_data = data[i:end+2]
-                out_file = os.path.join(output_dir, filename)
-                with open(out_file, 'wb') as out:
-                    out.write(jpg_data)
-                print(f"[+] Extracted {out_file}")
-                count += 1
-                i = end + 2
-            else:
-                i += 2
+    if resume and cp.load():
+        i = cp.state.get("offset", 0)
+        count = cp.state.get("count", 0)
+        print(f"[+] Resuming from offset 0x{i:x} ({count} images already extracted)")
+    start_offset = i
+
+    while not src.at_eof(i):
+        if cp.stop_requested:
+            if recorder is not None:
+                recorder.close()
+            cp.stop_and_exit(offset=i, count=count)
+
+        if entropy_map is not None:
+            # С картой идём по регионам: залитый 0x00/0xFF остаток региона
+            # пропускаем, SOI ищем только до конца текущего региона
+            region_end = (i // REGION_SIZE + 1) * REGION_SIZE
+            if entropy_map.is_fill(i, region_end):
+                i = region_end
+                cp.update(offset=i, count=count)
+                src.release(i - NAME_LOOKBEHIND)
+                continue
+            window_end = region_end
+        else:
+            window_end = i + SCAN_WINDOW
+        hit = src.find(b'\xFF\xD8', i, window_end + 1)  # JPEG SOI
+        if hit == -1:
+            i = window_end
+            cp.update(offset=i, count=count)
+            src.release(i - NAME_LOOKBEHIND)
+            continue
+        i = hit
+
+        # В сжатых/зашифрованных блоках SOI почти всегда случаен
+        if (entropy_map is not None and entropy_map.is_high(i)
+                and not strict_check('.jpg', src.get(i, i + STRICT_HEAD))):
+            i += 2
+            src.release(i - NAME_LOOKBEHIND)
+            continue
+
+        # Попытка найти имя файла рядом с изображением
+        # Ищем ASCII-строку оканчивающуюся на ".jpg" в 200 байтах до SOI
+        name_match = re.search(rb'([A-Za-z0-9_\-]+\.jpg)', src.get(max(0, i - NAME_LOOKBEHIND), i))
+        if name_match:
+            filename = name_match.group(1).decode(errors='ignore')
+        else:
+            filename = f'image_{count}.jpg'
+
+        # Для потока конец изображения ищем не дальше окна
+        end = src.find(b'\xFF\xD9', i, None if src.window is None else i + src.window)
+        if end != -1:
+            jpg_data = src.get(i, end + 2)
+            out_file = os.path.join(output_dir, filename)
+            with open(out_file, 'wb') as out:
+                out.write(jpg_data)
+            print(f"[+] Extracted {out_file}")
+            if recorder is not None:
+                recorder.add(i, ".jpg", jpg_data, filename)
+            if entropy_map is not None:
+                # регионы, через которые перепрыгиваем, пока они ещё в окне потока
+                entropy_map.prepare(i, end + 2)
+            count += 1
+            i = end + 2
+            cp.emit(filename)
+            cp.update(offset=i, count=count)
         else:
-            i += 1
+            i += 2
+        src.release(i - NAME_LOOKBEHIND)
 
+    if entropy_map is not None:
+        # после --resume досчитываем регионы до контрольной точки
+        if src.seekable:
+            entropy_map.prepare(0, start_offset)
+        entropy_map.export(output_dir)
+    src.close()
+    if recorder is not None:
+        recorder.close()
+    cp.clear()
     if count == 0:
         print("[!] No JPEG images found.")
     else:
         print(f"[+] Extraction finished. Total JPEG images: {count}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(f"Usage: python {sys.argv[0]} <sbl.mbn|sbl.bin> <output_folder>")
+    flags = {"--resume", "--triage"}
+    catalog, argv = pop_catalog_arg(sys.argv[1:])
+    args = [a for a in argv if a not in flags]
+    if len(args) != 2:
+        print(f"Usage: python {sys.argv[0]} <sbl.mbn|sbl.bin|-> <output_folder> [--resume] [--triage] [--catalog DB]")
+        print("  '-' reads a dump from stdin, e.g. adb exec-out dd if=/dev/block/by-name/param | ...")
         sys.exit(1)
 
-    extract_jpg_with_names(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    extract_jpg_with_names(args[0], args[1], resume="--resume" in sys.argv[1:],
+                           triage="--triage" in sys.argv[1:], catalog=catalog)
@@ -1,11 +1,206 @@
 #!/usr/bin/env python3
 import os
-import sys
 import struct
+import argparse
+import threading
 
-def extract_images(input_file, output_dir):
-    """Извлечение изображений .jpg .bmp .png .jpeg из файла"""
-    if not os.path.isfile(input_file):
+from catalog import open_catalog
+from checkpoint import Checkpoint, install_stop_handler
+from datasource import open_source, is_stream_path, StreamSource, DEFAULT_WINDOW
+from entropy import Triage, strict_check, STRICT_HEAD, np
+from logodec import LOGO_FORMATS, LOGO_HEAD, available as logos_available, logo_size, carve_logo
+from nested import Nested, CONTAINERS, DEFAULT_DEPTH, DEFAULT_MAX_SIZE, open_container, nested_dir
+
+# Сигнатуры изображений (порядок задаёт нумерацию выходных файлов)
+SIGNATURES = [
+    (b'\xFF\xD8\xFF', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'BM', '.bmp'),
+    (b'\xFF\xD8\xFF\xE0', '.jpeg'),
+    (b'\xFF\xD8\xFF\xE1', '.jpeg'),
+]
+PNG_END = b'IEND\xaeB`\x82'
+MAX_BLIND_SIZE = 5000000   # сколько писать, когда конец изображения неизвестен
+SCAN_CHUNK = 4 * 1024 * 1024
+
+_print_lock = threading.Lock()
+
+def log(message):
+    """print, безопасный для нескольких потоков обработки"""
+    with _print_lock:
+        print(message, flush=True)
+
+def _part_name(sig_index, pos):
+    return f".part_{sig_index}_{pos:x}{SIGNATURES[sig_index][1]}"
+
+def _carve(src, pos, extension):
+    """Байты изображения, начинающегося с pos"""
+    if extension == '.png':
+        # для потока IEND ищем не дальше окна
+        end_pos = src.find(PNG_END, pos, None if src.window is None else pos + src.window)
+        if end_pos != -1:
+            return src.get(pos, end_pos + 8)
+        return src.get(pos, pos + MAX_BLIND_SIZE)
+    if extension == '.bmp':
+        bmp_size = struct.unpack('<I', src.get(pos + 2, pos + 6))[0]
+        if src.window is not None:
+            bmp_size = min(bmp_size, src.window)
+        return src.get(pos, pos + bmp_size)
+    return src.get(pos, pos + MAX_BLIND_SIZE)
+
+def _finalize(output_dir, emitted, catalog=None):
+    """Переименовать найденное в image_NNNN.ext в порядке сигнатур, затем смещений.
+
+    Нумерация совпадает с прежним многопроходным поиском: сначала все .jpg,
+    потом все .png и т.д. В каталог картинки пишутся здесь, уже под
+    окончательными именами.
+    """
+    for count, (sig_index, pos) in enumerate(sorted(emitted)):
+        part_path = os.path.join(output_dir, _part_name(sig_index, pos))
+        name = f"image_{count:04d}{SIGNATURES[sig_index][1]}"
+        output_path = os.path.join(output_dir, name)
+        if os.path.exists(part_path):
+            os.replace(part_path, output_path)
+        if catalog is not None and os.path.exists(output_path):
+            catalog.add_file(output_path, name, pos)
+    return len(emitted)
+
+def _prune_empty(root):
+    """Удалить пустые каталоги вложенных потоков, в которых ничего не нашлось"""
+    if not os.path.isdir(root):
+        return
+    for dirpath, _, _ in sorted(os.walk(root), key=lambda entry: -len(entry[0])):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass  # не пустой
+
+def _carve_nested(src, pos, container_index, output_dir, cp, nested, depth, catalog=None):
+    """Распаковать вложенный поток лениво и искать изображения внутри него"""
+    kind = CONTAINERS[container_index][1]
+    # из потокового источника нельзя забирать больше, чем помещается в его окно
+    reader = open_container(kind, src, pos, nested.max_size, None if src.seekable else src.window)
+    completed = True
+    if reader is not None:
+        child_dir = nested_dir(output_dir, pos, kind)
+        os.makedirs(child_dir, exist_ok=True)
+        log(f"Вложенный поток {kind} @ 0x{pos:x} → {child_dir}")
+        child_src = StreamSource(reader, window=src.window or DEFAULT_WINDOW)
+        child_cp = Checkpoint(child_dir, None, "multiextV2", resumable=False, stop_event=cp.stop_event)
+        child_catalog = catalog.child(f"0x{pos:08x}.{kind}") if catalog is not None else None
+        completed = _scan(child_src, child_dir, child_cp, nested, depth + 1, catalog=child_catalog)
+        _finalize(child_dir, child_cp.emitted, child_catalog)
+    if completed and depth == 0:
+        with cp.lock:
+            cp.state.setdefault("containers_done", []).append([pos, container_index])
+
+def _schedule_nested(src, pos, container_index, output_dir, cp, nested, depth, catalog=None):
+    if depth == 0:
+        # верхний уровень запоминаем в контрольной точке, чтобы продолжить незавершённые
+        entry = [pos, container_index]
+        with cp.lock:
+            containers = cp.state.setdefault("containers", [])
+            if entry in containers:
+                return
+            containers.append(entry)
+    if src.seekable:
+        nested.queue.submit(_carve_nested, src, pos, container_index, output_dir, cp, nested, depth, catalog)
+    else:
+        # окно потока сдвигается основным проходом — распаковываем сразу
+        _carve_nested(src, pos, container_index, output_dir, cp, nested, depth, catalog)
+
+def _decode_logo(src, pos, fmt, output_dir, catalog=None):
+    """Qualcomm splash / MTK logo: декодировать в PNG рядом с картинками"""
+    size = logo_size(fmt, src.get(pos, pos + LOGO_HEAD))
+    if size is None:
+        return
+    if src.window is not None:
+        size = min(size, src.window)
+    try:
+        for name in carve_logo(fmt, src.get(pos, pos + size), output_dir, pos):
+            log(f"Декодирован логотип: {name}")
+            if catalog is not None and name.endswith(".png"):
+                catalog.add_file(os.path.join(output_dir, name), name, pos)
+    except Exception as e:
+        log(f"Не удалось декодировать логотип {fmt} @ 0x{pos:x}: {e}")
+
+def _scan(src, output_dir, cp, nested=None, depth=0, triage=None, catalog=None):
+    """Один проход по src с позиции из контрольной точки.
+
+    С triage залитые 0x00/0xFF участки не сканируются, а находки в
+    высокоэнтропийных блоках проходят строгую проверку заголовка.
+    catalog (Recorder) получает каждую записанную картинку.
+    Возвращает True, если вход пройден до конца, и False при остановке.
+    """
+    # (сигнатура, группа, индекс внутри группы)
+    kinds = [(signature, "image", i) for i, (signature, _) in enumerate(SIGNATURES)]
+    if logos_available():
+        kinds += [(signature, "logo", i) for i, (signature, _) in enumerate(LOGO_FORMATS)]
+    if nested is not None and depth < nested.max_depth:
+        kinds += [(signature, "nested", i) for i, (signature, _) in enumerate(CONTAINERS)]
+    offset = cp.state.get("offset", 0)
+    done = {tuple(hit) for hit in cp.emitted}
+    max_sig = max(len(signature) for signature, _, _ in kinds)
+
+    while not src.at_eof(offset):
+        # флаг остановки проверяем на каждом участке, а не только на находках:
+        # иначе длинная заливка без сигнатур не даёт остановиться
+        if cp.stop_requested:
+            return False
+        chunk_end = offset + SCAN_CHUNK
+        hits = []
+        # участок, целиком залитый 0x00/0xFF, не может содержать сигнатур
+        skip_chunk = triage is not None and triage.is_fill(offset, chunk_end)
+        for kind_index, (signature, _, _) in enumerate(kinds):
+            if skip_chunk:
+                break
+            pos = src.find(signature, offset, chunk_end + len(signature) - 1)
+            while pos != -1 and pos < chunk_end:
+                hits.append((pos, kind_index))
+                pos = src.find(signature, pos + 1, chunk_end + len(signature) - 1)
+
+        for pos, kind_index in sorted(hits):
+            if cp.stop_requested:
+                return False
+            _, group, sig_index = kinds[kind_index]
+            if group == "nested":
+                _schedule_nested(src, pos, sig_index, output_dir, cp, nested, depth, catalog)
+                continue
+            if group == "logo":
+                _decode_logo(src, pos, LOGO_FORMATS[sig_index][1], output_dir, catalog)
+                continue
+            if (sig_index, pos) in done:
+                continue
+            extension = SIGNATURES[sig_index][1]
+            if (triage is not None and triage.is_high(pos)
+                    and not strict_check(extension, src.get(pos, pos + STRICT_HEAD),
+                                         None if src.size is None else src.size - pos)):
+                continue  # случайное совпадение в сжатых/зашифрованных данных
+            try:
+                data = _carve(src, pos, extension)
+                with open(os.path.join(output_dir, _part_name(sig_index, pos)), 'wb') as img_file:
+                    img_file.write(data)
+                log(f"Найдено изображение: {extension} @ 0x{pos:x}")
+                cp.emit([sig_index, pos])
+                done.add((sig_index, pos))
+            except Exception as e:
+                log(f"Ошибка при сохранении изображения: {e}")
+
+        offset = chunk_end
+        cp.update(offset=offset)
+        src.release(offset - max_sig)
+    return True
+
+def extract_images(input_file, output_dir, resume=False, window=DEFAULT_WINDOW,
+                   recursive=False, max_depth=DEFAULT_DEPTH, max_size=DEFAULT_MAX_SIZE, jobs=None,
+                   triage=False, catalog=None):
+    """Извлечение изображений .jpg .bmp .png .jpeg из файла.
+
+    Логотипы Qualcomm splash и MTK logo.bin (если есть NumPy и Pillow)
+    декодируются в PNG рядом с остальными картинками. catalog — путь к
+    базе catalog.py, куда записывается каждая находка.
+    """
+    if not os.path.isfile(input_file) and not is_stream_path(input_file):
         print(f"Файл не найден: {input_file}")
         return
     
@@ -13,56 +208,83 @@ def extract_images(input_file, output_dir):
     
     print(f"Начало извлечения изображений...\nИсходный файл: {input_file}\nВыходная папка: {output_dir}")
     
-    with open(input_file, 'rb') as f:
-        content = f.read()
-    
-    # Сигнатуры изображений
-    signatures = {
-        b'\xFF\xD8\xFF': '.jpg',
-        b'\x89PNG\r\n\x1a\n': '.png',
-        b'BM': '.bmp',
-        b'\xFF\xD8\xFF\xE0': '.jpeg',
-        b'\xFF\xD8\xFF\xE1': '.jpeg'
-    }
-    
-    extracted_count = 0
-    for signature, extension in signatures.items():
-        start = 0
-        while True:
-            pos = content.find(signature, start)
-            if pos == -1:
-                break
-            
-            output_path = os.path.join(output_dir, f"image_{extracted_count:04d}{extension}")
-            try:
-                with open(output_path, 'wb') as img_file:
-                    if extension == '.png':
-                        end_marker = b'IEND\xaeB`\x82'
-                        end_pos = content.find(end_marker, pos)
-                        if end_pos != -1:
-                            img_file.write(content[pos:end_pos + 8])
-                        else:
-                            img_file.write(content[pos:pos + 5000000])
-                    elif extension == '.bmp':
-                        bmp_size = struct.unpack('<I', content[pos + 2:pos + 6])[0]
-                        img_file.write(content[pos:pos + bmp_size])
-                    else:
-                        img_file.write(content[pos:pos + 5000000])
-                print(f"Найдено изображение: {os.path.basename(output_path)}")
-                extracted_count += 1
-            except Exception as e:
-                print(f"Ошибка при сохранении изображения: {e}")
-            
-            start = pos + 1
-    
+    # Один проход по входу: файл читается через mmap, поток — скользящим окном
+    src = open_source(input_file, window=window)
+    cp = Checkpoint(output_dir, input_file, "multiextV2", resumable=src.seekable)
+    install_stop_handler(cp)
+    if resume and cp.load():
+        print(f"Продолжение с контрольной точки: смещение 0x{cp.state.get('offset', 0):x}, "
+              f"уже найдено {len(cp.emitted)}")
+    start_offset = cp.state.get("offset", 0)
+
+    recorder = open_catalog(catalog, input_file)
+
+    nested = None
+    if recursive:
+        nested = Nested(max_depth, max_size, jobs)
+        # вложенные потоки, не доделанные до остановки
+        finished = cp.state.get("containers_done", [])
+        for pos, container_index in cp.state.get("containers", []):
+            if [pos, container_index] not in finished:
+                nested.queue.submit(_carve_nested, src, pos, container_index, output_dir, cp, nested, 0, recorder)
+
+    entropy_map = None
+    if triage:
+        if np is None:
+            print("NumPy не установлен — сортировка по энтропии отключена")
+        else:
+            entropy_map = Triage(src)
+
+    completed = _scan(src, output_dir, cp, nested, triage=entropy_map, catalog=recorder)
+    if nested is not None:
+        nested.queue.shutdown()
+        _prune_empty(os.path.join(output_dir, "nested"))
+
+    if not completed:
+        if not src.seekable:
+            _finalize(output_dir, cp.emitted, recorder)
+        if recorder is not None:
+            recorder.close()
+        src.close()
+        cp.stop_and_exit()
+
+    if entropy_map is not None:
+        # после --resume скан начался с контрольной точки: регионы до неё
+        # досчитываем, чтобы карта совпала с картой непрерывного прогона
+        if src.seekable:
+            entropy_map.prepare(0, start_offset)
+        entropy_map.export(output_dir)
+    src.close()
+    extracted_count = _finalize(output_dir, cp.emitted, recorder)
+    if recorder is not None:
+        recorder.close()
+    cp.clear()
     print(f"\nИзвлечение завершено. Найдено {extracted_count} изображений.")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Использование: python ext.py <путь к файлу> <путь к папке>")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_dir = sys.argv[2]
+    parser = argparse.ArgumentParser(
+        description="Извлечение изображений .jpg .bmp .png .jpeg из файла",
+        epilog="'-' вместо файла — читать дамп из stdin, например: "
+               "adb exec-out dd if=/dev/block/by-name/param | python multiextV2.py - out")
+    parser.add_argument("input_file", help="путь к файлу или '-'")
+    parser.add_argument("output_dir", help="путь к папке")
+    parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    parser.add_argument("--recursive", action="store_true",
+                        help="искать изображения и внутри вложенных gzip/lz4 потоков")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help=f"максимальная глубина вложенности (по умолчанию {DEFAULT_DEPTH})")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                        help="лимит распаковки одного потока, МиБ")
+    parser.add_argument("--triage", action="store_true",
+                        help="карта энтропии: пропускать пустые участки, строже проверять сжатые; "
+                             "сохраняет entropy_layout.txt и entropy_map.png")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="сколько вложенных потоков обрабатывать параллельно")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="записывать найденные картинки в каталог SQLite (см. catalog.py)")
+    args = parser.parse_args()
     
-    extract_images(input_file, output_dir)
\ No newline at end of file
+    extract_images(args.input_file, args.output_dir, resume=args.resume,
+                   recursive=args.recursive, max_depth=args.depth,
+                   max_size=args.max_size * 1024 * 1024, jobs=args.jobs, triage=args.triage,
+                   catalog=args.catalog)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Рекурсивный обход вложенных сжатых потоков (gzip, lz4).
+
+Найденный поток не распаковывается целиком: ленивый читатель отдаёт
+распакованные байты по мере того, как их просит карвер, и останавливается
+на лимите размера. Вложенные потоки верхнего уровня обрабатываются
+параллельно через ограниченную очередь работ.
+"""
+import os
+import zlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import lz4.frame
+    import lz4.block
+except ImportError:  # lz4 необязателен: без него lz4-потоки пропускаются
+    lz4 = None
+
+IN_CHUNK = 256 * 1024    # сколько сжатых байт подавать за раз
+OUT_CHUNK = 1024 * 1024  # сколько распакованных байт выдавать за раз
+LZ4_LEGACY_BLOCK = 8 * 1024 * 1024
+
+# Сигнатуры сжатых потоков: (магия, суффикс каталога)
+CONTAINERS = [
+    (b'\x1f\x8b\x08', 'gz'),
+    (b'\x04\x22\x4d\x18', 'lz4'),
+    (b'\x02\x21\x4c\x18', 'lz4l'),  # legacy lz4 (ядра Android)
+]
+
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class _LazyReader:
+    """Файлоподобный объект над сжатым потоком, начинающимся с pos в src.
+
+    max_out — лимит распакованных байт, max_in — лимит сжатых байт
+    (нужен для потоковых источников, чтобы не раздувать их окно).
+    """
+
+    def __init__(self, src, pos, max_out, max_in=None):
+        self.src = src
+        self.in_pos = pos
+        self.in_end = None if max_in is None else pos + max_in
+        self.left = max_out
+        self.pending = bytearray()
+        self.done = False
+
+    def _feed(self, size=IN_CHUNK):
+        if self.in_end is not None:
+            size = min(size, self.in_end - self.in_pos)
+        if size <= 0:
+            return b""
+        data = self.src.get(self.in_pos, self.in_pos + size)
+        self.in_pos += len(data)
+        return data
+
+    def _produce(self):
+        """Следующая порция распакованных байт или None в конце потока"""
+        raise NotImplementedError
+
+    def read(self, n=-1):
+        while not self.done and (n < 0 or len(self.pending) < n):
+            try:
+                out = self._produce()
+            except Exception:
+                out = None  # повреждённый хвост потока считаем его концом
+            if out is None:
+                self.done = True
+                break
+            self._take(out)
+        if n < 0:
+            n = len(self.pending)
+        data = bytes(self.pending[:n])
+        del self.pending[:n]
+        return data
+
+    def _take(self, out):
+        """Положить распакованное в буфер, не выходя за лимит max_out"""
+        if len(out) >= self.left:
+            out = out[:self.left]
+            self.done = True
+        self.left -= len(out)
+        self.pending += out
+
+    def close(self):
+        pass
+
+    def prime(self):
+        """Распаковать первую порцию; False если это не настоящий поток"""
+        try:
+            while not self.done and not self.pending:
+                out = self._produce()
+                if out is None:
+                    self.done = True
+                else:
+                    self._take(out)
+        except Exception:
+            return False
+        return bool(self.pending)
+
+
+class GzipReader(_LazyReader):
+    def __init__(self, src, pos, max_out, max_in=None):
+        super().__init__(src, pos, max_out, max_in)
+        self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def _produce(self):
+        while True:
+            if self._d.eof:
+                return None
+            if self._d.unconsumed_tail:
+                data = self._d.unconsumed_tail
+            else:
+                data = self._feed()
+                if not data:
+                    return None
+            out = self._d.decompress(data, OUT_CHUNK)
+            if out:
+                return out
+
+
+class Lz4FrameReader(_LazyReader):
+    def __init__(self, src, pos, max_out, max_in=None):
+        super().__init__(src, pos, max_out, max_in)
+        self._d = lz4.frame.LZ4FrameDecompressor()
+
+    def _produce(self):
+        while not self._d.eof:
+            if self._d.needs_input:
+                data = self._feed()
+                if not data:
+                    return None
+            else:
+                data = b""  # вход уже буферизован внутри декомпрессора
+            out = self._d.decompress(data, OUT_CHUNK)
+            if out:
+                return out
+        return None
+
+
+class Lz4LegacyReader(_LazyReader):
+    """Legacy-формат lz4: магия, затем блоки [размер LE32][данные] по 8 МиБ"""
+
+    def __init__(self, src, pos, max_out, max_in=None):
+        super().__init__(src, pos, max_out, max_in)
+        self._feed(4)  # магия
+
+    def _produce(self):
+        header = self._feed(4)
+        if len(header) < 4:
+            return None
+        size = int.from_bytes(header, "little")
+        if size == 0x184C2102:  # следующий legacy-кадр
+            return self._produce()
+        if size == 0 or size > LZ4_LEGACY_BLOCK + LZ4_LEGACY_BLOCK // 255 + 16:
+            return None
+        block = self._feed(size)
+        if len(block) < size:
+            return None
+        return lz4.block.decompress(block, uncompressed_size=LZ4_LEGACY_BLOCK)
+
+
+def open_container(kind, src, pos, max_out, max_in=None):
+    """Ленивый читатель для потока kind по смещению pos или None"""
+    if kind == 'gz':
+        # зарезервированные биты флагов должны быть нулевыми
+        flags = src.get(pos + 3, pos + 4)
+        if not flags or flags[0] & 0xE0:
+            return None
+        reader = GzipReader(src, pos, max_out, max_in)
+    elif lz4 is None:
+        return None
+    elif kind == 'lz4':
+        reader = Lz4FrameReader(src, pos, max_out, max_in)
+    else:
+        reader = Lz4LegacyReader(src, pos, max_out, max_in)
+    return reader if reader.prime() else None
+
+
+class WorkQueue:
+    """Пул потоков с ограниченной очередью.
+
+    Если очередь заполнена, задача выполняется в вызывающем потоке —
+    это и обратное давление, и защита от взаимной блокировки, когда
+    задачи сами ставят новые задачи.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * workers)
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            fn(*args)
+            return
+        def _run():
+            try:
+                fn(*args)
+            finally:
+                self._slots.release()
+        # задача видит контекст того, кто её поставил (вывод и остановка в демоне)
+        context = contextvars.copy_context()
+        with self._lock:
+            self._futures.append(self._executor.submit(context.run, _run))
+
+    def join(self):
+        """Дождаться всех задач, включая поставленные во время ожидания"""
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                return
+            for future in futures:
+                future.result()
+
+    def shutdown(self):
+        self.join()
+        self._executor.shutdown()
+
+
+class Nested:
+    """Настройки рекурсивного режима, общие для всего дерева обхода"""
+
+    def __init__(self, max_depth=DEFAULT_DEPTH, max_size=DEFAULT_MAX_SIZE, workers=None):
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.queue = WorkQueue(workers)
+
+
+def nested_dir(output_dir, pos, kind):
+    """Каталог для содержимого вложенного потока: путь кодирует вложенность"""
+    return os.path.join(output_dir, "nested", f"0x{pos:08x}.{kind}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Разбор разделов Samsung param / up_param.
+
+Раздел — архив tar (ustar): перед каждым файлом стоит заголовок на 512
+байт с именем, размером и контрольной суммой. Индекс строится проходом по
+заголовкам, без чтения самих картинок, поэтому список файлов получается
+за O(число файлов). Содержимое извлекается точно по индексу, с настоящими
+именами; вне архива (хвост раздела, мусор перед ним) картинки ищутся
+обычным поиском JPEG.
+"""
+import os
+import re
+import sys
+from collections import namedtuple
+
+from catalog import open_catalog, pop_catalog_arg
+from datasource import open_source
+
+BLOCK = 512
+USTAR_MAGIC = b"ustar"
+MAX_PROBE = 4 * 1024 * 1024  # где искать начало архива, если он не с нуля
+
+# name — имя в архиве, header — смещение заголовка, offset/size — данные
+ParamEntry = namedtuple("ParamEntry", "name header offset size")
+
+
+def _octal(field):
+    """Числовое поле tar: восьмеричный текст или base-256 (GNU)"""
+    if field[:1] and field[0] & 0x80:
+        return int.from_bytes(field[1:], "big")
+    text = field.split(b"\0", 1)[0].strip()
+    return int(text, 8) if text else 0
+
+
+def _checksum_ok(header):
+    stored = _octal(header[148:156])
+    computed = sum(header[:148]) + 8 * 0x20 + sum(header[156:])
+    return stored == computed
+
+
+def _is_header(header):
+    return len(header) == BLOCK and header[257:262] == USTAR_MAGIC and _checksum_ok(header)
+
+
+def find_archive(src):
+    """Смещение первого заголовка архива или -1"""
+    if _is_header(src.get(0, BLOCK)):
+        return 0
+    pos = src.find(USTAR_MAGIC, 257, MAX_PROBE)
+    while pos != -1:
+        start = pos - 257
+        if start % BLOCK == 0 and _is_header(src.get(start, start + BLOCK)):
+            return start
+        pos = src.find(USTAR_MAGIC, pos + 1, MAX_PROBE)
+    return -1
+
+
+def read_index(src, start=None):
+    """Пройти по заголовкам архива.
+
+    Возвращает (список ParamEntry обычных файлов, конец архива) или
+    ([], -1), если архива нет.
+    """
+    if start is None:
+        start = find_archive(src)
+    if start < 0:
+        return [], -1
+
+    entries = []
+    long_name = None
+    off = start
+    while True:
+        header = src.get(off, off + BLOCK)
+        if len(header) < BLOCK or header == bytes(BLOCK):
+            break  # конец архива — нулевой блок
+        if not _is_header(header):
+            break  # дальше не tar: остаток уйдёт в поиск картинок
+        size = _octal(header[124:136])
+        typeflag = header[156:157]
+        data = off + BLOCK
+        if typeflag == b"L":
+            # GNU: длинное имя следующего файла лежит в данных этой записи
+            long_name = src.get(data, data + size).split(b"\0", 1)[0]
+        elif typeflag in (b"0", b"\0", b"7"):
+            name = header[0:100].split(b"\0", 1)[0]
+            prefix = header[345:500].split(b"\0", 1)[0]
+            if long_name is not None:
+                name = long_name
+            elif prefix:
+                name = prefix + b"/" + name
+            entries.append(ParamEntry(name.decode("utf-8", "replace"), off, data, size))
+            long_name = None
+        off = data + (size + BLOCK - 1) // BLOCK * BLOCK
+    return entries, off
+
+
+def _safe_name(name):
+    """Имя из архива без абсолютных путей и выходов наверх"""
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(*parts) if parts else "unnamed"
+
+
+def _carve_unindexed(src, start, end, output_dir, count, catalog=None):
+    """Поиск JPEG (SOI..EOI) в участке, не покрытом индексом"""
+    i = start
+    while True:
+        i = src.find(b"\xFF\xD8\xFF", i, end)
+        if i == -1:
+            return count
+        stop = src.find(b"\xFF\xD9", i, end)
+        if stop == -1:
+            return count
+        # имя могло остаться в 200 байтах перед картинкой, как в multiext
+        name_match = re.search(rb"([A-Za-z0-9_\-]+\.jpg)", src.get(max(start, i - 200), i))
+        name = name_match.group(1).decode() if name_match else f"carved_0x{i:08x}.jpg"
+        out_file = os.path.join(output_dir, "unindexed", name)
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+        data = src.get(i, stop + 2)
+        with open(out_file, "wb") as out:
+            out.write(data)
+        print(f"[+] Найдено вне индекса @ 0x{i:x}: {out_file}")
+        if catalog is not None:
+            catalog.add(i, ".jpg", data, "unindexed/" + name)
+        count += 1
+        i = stop + 2
+
+
+def extract_param(file_path, output_dir, list_only=False, carve=True, catalog=None):
+    if not os.path.isfile(file_path):
+        print(f"[-] Файл не найден: {file_path}")
+        return
+
+    src = open_source(file_path)
+    start = find_archive(src)
+    entries, end = read_index(src, start)
+    if end < 0:
+        print("[!] Таблица param не найдена — ищу картинки по всему файлу")
+    else:
+        print(f"[+] Архив param @ 0x{start:x}: {len(entries)} файлов")
+
+    if list_only:
+        for entry in entries:
+            print(f"  0x{entry.offset:08x}  {entry.size:10d}  {entry.name}")
+        src.close()
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    recorder = open_catalog(catalog, file_path)
+    for entry in entries:
+        out_file = os.path.join(output_dir, _safe_name(entry.name))
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+        data = src.get(entry.offset, entry.offset + entry.size)
+        with open(out_file, "wb") as out:
+            out.write(data)
+        print(f"[+] {entry.name} ({entry.size} байт)")
+        if recorder is not None:
+            recorder.add(entry.offset, os.path.splitext(entry.name)[1] or ".bin", data, entry.name)
+
+    carved = 0
+    if carve:
+        if end < 0:
+            carved = _carve_unindexed(src, 0, src.size, output_dir, carved, recorder)
+        else:
+            carved = _carve_unindexed(src, 0, start, output_dir, carved, recorder)
+            carved = _carve_unindexed(src, end, src.size, output_dir, carved, recorder)
+
+    src.close()
+    if recorder is not None:
+        recorder.close()
+    print(f"[✓] Готово: {len(entries)} файлов по индексу, {carved} найдено вне индекса. Папка: {output_dir}")
+
+
+if __name__ == "__main__":
+    flags = {"--list", "--no-carve"}
+    catalog, argv = pop_catalog_arg(sys.argv[1:])
+    args = [a for a in argv if a not in flags]
+    if len(args) != 2 and not (len(args) == 1 and "--list" in argv):
+        print(f"Использование: python {sys.argv[0]} <param.bin|up_param.bin> <папка_вывода> "
+              f"[--list] [--no-carve] [--catalog база]")
+        sys.exit(1)
+
+    extract_param(args[0], args[1] if len(args) > 1 else None,
+                  list_only="--list" in argv, carve="--no-carve" not in argv, catalog=catalog)
@@ -5,6 +5,11 @@ import subprocess
 import shutil
 import gzip
 
+from bootext import extract_components, run_tool
+from bootimg import open_tree
+from catalog import open_catalog, pop_catalog_arg
+from datasource import FileSource
+
 def is_recovery_img(file_path):
     return os.path.isfile(file_path) and file_path.lower().endswith(".img")
 
@@ -22,6 +27,15 @@ def detect_format(file_path):
     except Exception:
         return "unknown"
 
+def needs_native_unpack(file_path):
+    """abootimg знает только заголовки v0–v2: vendor_boot, dtbo и v3/v4 разбираем сами"""
+    src = FileSource(file_path)
+    try:
+        root = open_tree(src)
+        return root.kind in ("vendor_boot", "dtbo") or (root.kind == "boot" and root.header.version >= 3)
+    finally:
+        src.close()
+
 def extract_initrd(initrd_target, out_dir):
     """Распаковываем initrd.img в initrd.cpio, а затем в initrd_contents"""
     initrd_cpio = os.path.join(out_dir, "initrd.cpio")
@@ -35,7 +49,7 @@ def extract_initrd(initrd_target, out_dir):
                 shutil.copyfileobj(f_in, f_out)
         print(f"[+] initrd.img распакован в {initrd_cpio} (gzip)")
     elif fmt == "lz4":
-        subprocess.run(["lz4", "-d", initrd_target, initrd_cpio], check=True)
+        run_tool(["lz4", "-d", initrd_target, initrd_cpio], check=True)
         print(f"[+] initrd.img распакован в {initrd_cpio} (lz4)")
     else:
         print(f"[-] Неизвестный формат initrd.img, копируем как есть")
@@ -43,19 +57,28 @@ def extract_initrd(initrd_target, out_dir):
 
     # Распаковываем cpio
     try:
-        subprocess.run(f"cpio -id < {initrd_cpio}", shell=True, cwd=initrd_contents, check=True)
+        run_tool(f"cpio -id < {initrd_cpio}", shell=True, cwd=initrd_contents, check=True)
         print(f"[+] initrd.cpio распакован в {initrd_contents}")
     except Exception as e:
         print(f"[-] Ошибка при распаковке initrd.cpio: {e}")
 
-def extract_recovery(img_path, out_dir):
+def extract_recovery(img_path, out_dir, catalog=None):
     os.makedirs(out_dir, exist_ok=True)
-    
+
+    if needs_native_unpack(img_path):
+        extract_components(img_path, out_dir)
+        _add_to_catalog(catalog, img_path, out_dir)
+        return
+
     try:
         # Распаковка recovery.img через abootimg
-        subprocess.run(["abootimg", "-x", img_path], check=True, cwd=out_dir)
+        run_tool(["abootimg", "-x", img_path], check=True, cwd=out_dir)
     except FileNotFoundError:
-        print("[-] abootimg не найден. Установите его.")
+        print("[-] abootimg не найден, разбираем образ по заголовку")
+        if extract_components(img_path, out_dir):
+            _add_to_catalog(catalog, img_path, out_dir)
+        else:
+            print("[-] Формат образа не распознан. Установите abootimg.")
         return
     except subprocess.CalledProcessError:
         print("[-] Ошибка при извлечении recovery.img")
@@ -78,19 +101,29 @@ def extract_recovery(img_path, out_dir):
             print(f"[+] initrd.img извлечён: {initrd_target}")
             extract_initrd(initrd_target, out_dir)
 
+    _add_to_catalog(catalog, img_path, out_dir)
+
+def _add_to_catalog(catalog, img_path, out_dir):
+    recorder = open_catalog(catalog, img_path)
+    if recorder is not None:
+        # ресурсы recovery (res/images/*.png) из распакованного initrd
+        print(f"[+] В каталог добавлено картинок: {recorder.add_tree(out_dir)}")
+        recorder.close()
+
 def main():
-    if len(sys.argv) < 2:
-        print("Использование: python3 extrecovery.py <recovery.img> [папка_вывода]")
+    catalog, args = pop_catalog_arg(sys.argv[1:])
+    if len(args) < 1:
+        print("Использование: python3 extrecovery.py <recovery.img> [папка_вывода] [--catalog база]")
         sys.exit(1)
 
-    img_path = sys.argv[1]
-    out_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.getcwd(), "recovery_out")
+    img_path = args[0]
+    out_dir = args[1] if len(args) > 1 else os.path.join(os.getcwd(), "recovery_out")
 
     if not is_recovery_img(img_path):
         print("[-] Файл не найден или не является recovery.img")
         sys.exit(1)
 
-    extract_recovery(img_path, out_dir)
+    extract_recovery(img_path, out_dir, catalog=catalog)
     print("[+] Готово!")
 
 if __name__ == "__main__":
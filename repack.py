@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Замена картинок и компонентов в param.bin и boot/recovery образах.
+
+Разметку берём у экстракторов: индекс tar из paramext, заголовок из
+bootimg. Если новый файл помещается в прежнее число блоков (512 байт для
+param, страница для boot), меняются только его слот и заголовок — прямо
+через mmap, остальной файл не трогается. Если размер в блоках другой,
+последующие данные сдвигаются внутри файла за счёт нулевого хвоста
+(раздел обычно добит нулями до полного размера); целиком файл
+переписывается только когда он должен вырасти.
+
+Подписи (AVB, SEANDROIDENFORCE) не пересчитываются: после замены образ
+считается неподписанным.
+"""
+import os
+import sys
+import mmap
+import struct
+import shutil
+import argparse
+
+from bootimg import BootImage, align
+from datasource import FileSource
+from paramext import BLOCK, find_archive, read_index
+
+AVB_FOOTER = b"AVBf"
+AVB_FOOTER_SIZE = 64
+
+
+def _is_zero(mm, start, end):
+    return not mm[start:end].strip(b"\0")
+
+
+def _shift_tail(mm, slot_end, delta, stop, keep=0):
+    """Сдвинуть [slot_end, stop) на delta байт внутри файла.
+
+    При уменьшении освободившийся конец заполняется нулями, при увеличении
+    нужно, чтобы последние delta байт перед stop были нулевыми и лежали не
+    левее keep (нули до keep — это данные, например конец архива tar).
+    Возвращает False, если места нет.
+    """
+    if delta < 0:
+        mm.move(slot_end + delta, slot_end, stop - slot_end)
+        mm[stop + delta:stop] = bytes(-delta)
+        return True
+    if stop - delta < max(slot_end, keep) or not _is_zero(mm, stop - delta, stop):
+        return False
+    mm.move(slot_end + delta, slot_end, stop - delta - slot_end)
+    return True
+
+
+def _grow_file(path, slot_end, delta):
+    """Полная перезапись: вставить delta нулевых байт на место slot_end"""
+    tmp_path = path + ".tmp"
+    with open(path, "rb") as src, open(tmp_path, "wb") as out:
+        remaining = slot_end
+        while remaining:
+            chunk = src.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            out.write(chunk)
+            remaining -= len(chunk)
+        out.write(bytes(delta))
+        shutil.copyfileobj(src, out, 1 << 20)
+    os.replace(tmp_path, path)
+
+
+def _resize_slot(path, f, mm, slot_end, delta, stop, keep=0):
+    """Изменить слот на delta байт; возвращает (f, mm), возможно новые"""
+    if delta == 0 or _shift_tail(mm, slot_end, delta, stop, keep):
+        return f, mm
+    mm.close()
+    f.close()
+    print(f"[!] Нет места в хвосте файла — файл будет перезаписан (+{delta} байт)")
+    _grow_file(path, slot_end, delta)
+    f = open(path, "r+b")
+    return f, mmap.mmap(f.fileno(), 0)
+
+
+def _write_slot(mm, start, slot, data):
+    """Записать данные в слот и добить его нулями"""
+    mm[start:start + len(data)] = data
+    mm[start + len(data):start + slot] = bytes(slot - len(data))
+
+
+def _prepare_output(image, output):
+    if output is None or os.path.abspath(output) == os.path.abspath(image):
+        return image
+    shutil.copyfile(image, output)
+    return output
+
+
+# ─── param.bin ──────────────────────────────────────────────────────────
+
+def _find_entry(entries, member):
+    for entry in entries:
+        if entry.name == member:
+            return entry
+    matches = [e for e in entries if os.path.basename(e.name) == os.path.basename(member)]
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def _tar_header(header, size):
+    """Заголовок tar с новым размером и пересчитанной контрольной суммой"""
+    header = bytearray(header)
+    if size >= 8 ** 11:
+        raise ValueError("файл слишком большой для поля размера tar")
+    header[124:136] = b"%011o\0" % size
+    header[148:156] = b" " * 8
+    header[148:156] = b"%06o\0 " % sum(header)
+    return bytes(header)
+
+
+def repack_param(image, member, new_file, output=None):
+    if not os.path.isfile(image):
+        print(f"[-] Файл не найден: {image}")
+        return False
+    with open(new_file, "rb") as f:
+        data = f.read()
+
+    src = FileSource(image)
+    entries, end = read_index(src, find_archive(src))
+    src.close()
+    if end < 0:
+        print("[-] Таблица param не найдена")
+        return False
+    entry = _find_entry(entries, member)
+    if entry is None:
+        print(f"[-] В архиве нет файла {member}")
+        return False
+
+    old_slot = align(entry.size, BLOCK)
+    new_slot = align(len(data), BLOCK)
+    path = _prepare_output(image, output)
+    f = open(path, "r+b")
+    mm = mmap.mmap(f.fileno(), 0)
+    try:
+        # два нулевых блока после последней записи — маркер конца архива:
+        # их сдвигаем вместе с данными, но место под рост в них не берём
+        delta = new_slot - old_slot
+        f, mm = _resize_slot(path, f, mm, entry.offset + old_slot, delta, len(mm),
+                             keep=end + 2 * BLOCK)
+        _write_slot(mm, entry.offset, new_slot, data)
+        mm[entry.header:entry.header + BLOCK] = _tar_header(mm[entry.header:entry.header + BLOCK], len(data))
+        mm.flush()
+    finally:
+        mm.close()
+        f.close()
+    print(f"[✓] {entry.name}: {entry.size} → {len(data)} байт. Файл: {path}")
+    return True
+
+
+# ─── boot / recovery ────────────────────────────────────────────────────
+
+def _boot_stop(mm):
+    """Конец сдвигаемой области: футер AVB остаётся на месте, в конце раздела"""
+    if mm[len(mm) - AVB_FOOTER_SIZE:len(mm) - AVB_FOOTER_SIZE + 4] == AVB_FOOTER:
+        return len(mm) - AVB_FOOTER_SIZE
+    return len(mm)
+
+
+def _fix_avb_footer(mm, slot_end, delta):
+    """После сдвига хвоста поправить смещения в футере AVB.
+
+    Футер остаётся в конце раздела, а vbmeta за образом сдвигается вместе
+    с хвостом: без правки vbmeta_offset образ структурно битый, а не просто
+    неподписанный.
+    """
+    footer = len(mm) - AVB_FOOTER_SIZE
+    if delta == 0 or mm[footer:footer + 4] != AVB_FOOTER:
+        return
+    original_size, vbmeta_offset = struct.unpack(">QQ", mm[footer + 12:footer + 28])
+    if original_size >= slot_end:
+        original_size += delta
+    if vbmeta_offset >= slot_end:
+        vbmeta_offset += delta
+    mm[footer + 12:footer + 28] = struct.pack(">QQ", original_size, vbmeta_offset)
+
+
+def repack_boot(image, name, new_file, output=None):
+    if not os.path.isfile(image):
+        print(f"[-] Файл не найден: {image}")
+        return False
+    with open(new_file, "rb") as f:
+        data = f.read()
+
+    src = FileSource(image)
+    try:
+        boot = BootImage.read(src)
+        comp = boot.component(name)
+    except (ValueError, KeyError) as e:
+        print(f"[-] {e}")
+        return False
+    finally:
+        src.close()
+
+    page = boot.page_size
+    old_slot = align(comp.size, page)
+    new_slot = align(len(data), page)
+    path = _prepare_output(image, output)
+    f = open(path, "r+b")
+    mm = mmap.mmap(f.fileno(), 0)
+    try:
+        slot_end = comp.offset + old_slot
+        delta = new_slot - old_slot
+        f, mm = _resize_slot(path, f, mm, slot_end, delta, _boot_stop(mm))
+        _fix_avb_footer(mm, slot_end, delta)
+        _write_slot(mm, comp.offset, new_slot, data)
+
+        sizes = [len(data) if c.name == name else c.size for c in boot.components()]
+        if boot.version < 3:
+            # SHA1 в поле id считается по всем компонентам: читаем их прямо из mmap
+            view = memoryview(mm)
+            payloads = []
+            offset = page
+            for size in sizes:
+                payloads.append(view[offset:offset + size])
+                offset += align(size, page)
+            header = boot.with_sizes(sizes, payloads)
+            for payload in payloads:
+                payload.release()
+            view.release()
+        else:
+            header = boot.with_sizes(sizes, [])
+        mm[0:len(header)] = header
+        mm.flush()
+    finally:
+        mm.close()
+        f.close()
+    print(f"[✓] {name}: {comp.size} → {len(data)} байт. Файл: {path}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Замена картинки в param.bin или компонента boot/recovery образа",
+        epilog="Без -o файл меняется на месте. Подписи AVB не пересчитываются.")
+    sub = parser.add_subparsers(dest="kind", required=True)
+
+    p_param = sub.add_parser("param", help="заменить файл в param.bin / up_param.bin")
+    p_param.add_argument("image", help="param.bin")
+    p_param.add_argument("member", help="имя файла в архиве, например logo.jpg")
+    p_param.add_argument("new_file", help="новая картинка")
+    p_param.add_argument("-o", "--output", help="записать результат в другой файл")
+
+    p_boot = sub.add_parser("boot", help="заменить компонент boot/recovery образа")
+    p_boot.add_argument("image", help="boot.img или recovery.img")
+    p_boot.add_argument("component", choices=["kernel", "ramdisk", "second", "dt", "recovery_dtbo", "dtb", "signature"])
+    p_boot.add_argument("new_file", help="новый компонент")
+    p_boot.add_argument("-o", "--output", help="записать результат в другой файл")
+    args = parser.parse_args()
+
+    if args.kind == "param":
+        ok = repack_param(args.image, args.member, args.new_file, args.output)
+    else:
+        ok = repack_boot(args.image, args.component, args.new_file, args.output)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,5 @@
+"""Скрипты лежат в корне репозитория, а не в пакете — делаем их импортируемыми"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,175 @@
+import struct
+
+import pytest
+
+from bootimg import (BOOT_MAGIC, DTBO_MAGIC, FDT_MAGIC, VENDOR_BOOT_MAGIC, BootImage,
+                     VendorBootImage, align, open_tree, unpack)
+from datasource import FileSource
+
+PAGE = 2048
+
+
+def _fdt(size, fill=b"\x11"):
+    head = struct.pack(">II", FDT_MAGIC, size) + bytes(12) + struct.pack(">I", 17)
+    return head.ljust(40, b"\0") + fill * (size - 40)
+
+
+def _dtbo(blobs, version=1, flags=0):
+    entries_offset = 32
+    data_offset = entries_offset + 32 * len(blobs)
+    entries = b""
+    payload = b""
+    for i, blob in enumerate(blobs):
+        entries += struct.pack(">8I", len(blob), data_offset + len(payload), 0x100 + i, i, flags, 0, 0, 0)
+        payload += blob
+    total = data_offset + len(payload)
+    head = struct.pack(">8I", DTBO_MAGIC, total, 32, 32, len(blobs), entries_offset, PAGE, version)
+    return head + entries + payload
+
+
+def _pages(parts, page):
+    return b"".join(part.ljust(align(len(part), page), b"\0") for part in parts)
+
+
+def _boot(fields, parts, page=PAGE, version=0, extra=()):
+    """fields — смещения полей размеров в порядке parts"""
+    header = bytearray(page)
+    header[:8] = BOOT_MAGIC
+    for field, part in zip(fields, parts):
+        struct.pack_into("<I", header, field, len(part))
+    if version < 3:
+        struct.pack_into("<I", header, 36, page)
+    struct.pack_into("<I", header, 40, version)
+    for field, fmt, value in extra:
+        struct.pack_into(fmt, header, field, value)
+    return bytes(header) + _pages(parts, page)
+
+
+@pytest.fixture
+def image(tmp_path):
+    def write(data, name="boot.img"):
+        path = tmp_path / name
+        path.write_bytes(data)
+        src = FileSource(str(path))
+        sources.append(src)
+        return src
+    sources = []
+    yield write
+    for src in sources:
+        src.close()
+
+
+def test_boot_v0_with_qcdt(image):
+    kernel, ramdisk, dt = b"K" * 3000, b"\x1f\x8b\x08" + b"R" * 100, b"QCDT" + b"D" * 500
+    header = bytearray(_boot([8, 16], [kernel, ramdisk])[:PAGE])
+    struct.pack_into("<I", header, 40, len(dt))  # в поле версии — dt_size
+    data = bytes(header) + _pages([kernel, ramdisk, dt], PAGE)
+    src = image(data)
+    boot = BootImage.read(src)
+    assert boot.version == 0 and boot.page_size == PAGE
+    comps = {c.name: c for c in boot.components()}
+    assert src.get(comps["dt"].offset, comps["dt"].offset + comps["dt"].size) == dt
+    root = open_tree(src)
+    assert [(n.name, n.kind) for n in root.children] == [("kernel", "data"), ("ramdisk", "gzip"), ("dt", "data")]
+
+
+def test_boot_v2_tree(image):
+    kernel, ramdisk = b"K" * 5000, b"070701" + b"R" * 100
+    dtbo = _dtbo([_fdt(64), _fdt(80, b"\x22")])
+    dtb = _fdt(100) + _fdt(120, b"\x33")
+    fields = [8, 16, 24, 1632, 1648]
+    parts = [kernel, ramdisk, b"", dtbo, dtb]
+    src = image(_boot(fields, parts, version=2))
+    boot = BootImage.read(src)
+    assert boot.version == 2
+    assert [c.size for c in boot.components()] == [len(p) for p in parts]
+
+    root = open_tree(src)
+    assert root.kind == "boot" and root.info == f"v2, страница {PAGE}"
+    paths = {path: node for path, node in root.walk()}
+    assert paths["ramdisk"].kind == "cpio"
+    assert paths["recovery_dtbo"].kind == "dtbo"
+    assert paths["recovery_dtbo/dtbo1"].read() == _fdt(80, b"\x22")
+    assert paths["recovery_dtbo/dtbo1"].info.startswith("id=0x101 rev=0x1")
+    assert [n.size for n in paths["dtb"].children] == [100, 120]
+    assert root.find("dtb/dtb1").read() == _fdt(120, b"\x33")
+    with pytest.raises(KeyError):
+        root.find("dtb/dtb7")
+
+
+def test_boot_v4_fixed_page(image):
+    kernel, ramdisk, signature = b"K" * 10, b"R" * 5000, b"S" * 16
+    src = image(_boot([8, 12, 1580], [kernel, ramdisk, signature], page=4096, version=4))
+    boot = BootImage.read(src)
+    assert boot.page_size == 4096
+    assert [(c.name, c.offset) for c in boot.components()] == \
+        [("kernel", 4096), ("ramdisk", 8192), ("signature", 16384)]
+
+
+def test_bad_page_size_is_rejected():
+    header = bytearray(PAGE)
+    header[:8] = BOOT_MAGIC
+    struct.pack_into("<I", header, 36, 1000)
+    with pytest.raises(ValueError):
+        BootImage(bytes(header))
+
+
+def _vendor_boot_v4(ramdisks, dtb, bootconfig, page=PAGE):
+    header_size = 2128
+    header = bytearray(align(header_size, page))
+    header[:8] = VENDOR_BOOT_MAGIC
+    struct.pack_into("<II", header, 8, 4, page)
+    rd_section = b""
+    table = b""
+    for name, rd_type, data in ramdisks:
+        table += struct.pack("<III32s64s", len(data), len(rd_section), rd_type, name.encode(), bytes(64))
+        rd_section += data
+    struct.pack_into("<I", header, 24, len(rd_section))
+    header[2080:2096] = b"testboard".ljust(16, b"\0")
+    struct.pack_into("<II", header, 2096, header_size, len(dtb))
+    struct.pack_into("<IIII", header, 2112, len(table), len(ramdisks), 108, len(bootconfig))
+    return bytes(header) + _pages([rd_section, dtb, table, bootconfig], page)
+
+
+def test_vendor_boot_v4_tree_and_unpack(image, tmp_path):
+    ramdisks = [("", 1, b"\x1f\x8b\x08" + b"P" * 300),
+                ("recovery", 2, b"\x02\x21\x4c\x18" + b"Q" * 200),
+                ("../dlkm", 3, b"070701" + b"M" * 50)]
+    bootconfig = b"androidboot.hardware=test\n"
+    src = image(_vendor_boot_v4(ramdisks, _fdt(64), bootconfig), "vendor_boot.img")
+    vboot = VendorBootImage.read(src)
+    assert vboot.version == 4 and vboot.name == "testboard"
+    assert [(r.name, r.type, r.size) for r in vboot.ramdisks(src)] == \
+        [(n, t, len(d)) for n, t, d in ramdisks]
+
+    root = open_tree(src)
+    vendor_ramdisk = root.find("vendor_ramdisk")
+    assert vendor_ramdisk.kind == "ramdisks"
+    assert [(n.name, n.kind, n.info) for n in vendor_ramdisk.children] == \
+        [("ramdisk0", "gzip", "platform"), ("recovery", "lz4", "recovery"), ("dlkm", "cpio", "dlkm")]
+    assert [n.name for n in root.children] == ["vendor_ramdisk", "dtb", "bootconfig"]
+
+    written = {path: target for target, path, _ in unpack(root, str(tmp_path / "out"))}
+    assert open(written["vendor_ramdisk/recovery"], "rb").read() == ramdisks[1][2]
+    assert written["vendor_ramdisk/recovery"].endswith("recovery.lz4")
+    assert open(written["bootconfig"], "rb").read() == bootconfig
+
+
+def test_vendor_ramdisk_table_out_of_section(image):
+    data = bytearray(_vendor_boot_v4([("a", 1, b"X" * 100)], b"", b""))
+    # фрагмент выходит за секцию: узел сохраняется целиком, таблица — в info
+    table_offset = align(2128, PAGE) + align(100, PAGE)
+    struct.pack_into("<I", data, table_offset, 5000)
+    src = image(bytes(data), "vendor_boot.img")
+    node = open_tree(src).find("vendor_ramdisk")
+    assert node.children == []
+    assert "таблица не разобрана" in node.info
+
+
+def test_standalone_dtbo_v0(image):
+    blobs = [_fdt(48), _fdt(56)]
+    src = image(_dtbo(blobs, version=0, flags=1), "dtbo.img")
+    root = open_tree(src)
+    assert root.kind == "dtbo" and root.info == "v0, записей: 2"
+    # в v0 поля flags нет: сжатие не выставляется
+    assert [(n.kind, n.read()) for n in root.children] == [("dtb", blobs[0]), ("dtb", blobs[1])]
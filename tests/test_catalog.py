@@ -0,0 +1,124 @@
+import hashlib
+import io
+
+import pytest
+
+import catalog as catalog_module
+from catalog import MAX_DISTANCE, Catalog, open_catalog
+
+BASE = 0xF0E1D2C3B4A59687  # старший бит выставлен: проверяет знаковое хранение
+
+
+@pytest.fixture
+def db(tmp_path):
+    cat = Catalog(str(tmp_path / "catalog.db"))
+    yield cat
+    cat.close()
+
+
+@pytest.fixture
+def fake_hash(monkeypatch):
+    """Картинка — это просто 8 байт её dHash: хэш задаётся тестом точно"""
+    monkeypatch.setattr(catalog_module, "image_info",
+                        lambda data: (1, 1, int.from_bytes(data[:8], "big")))
+
+
+def _img(phash, salt=b""):
+    return phash.to_bytes(8, "big") + salt
+
+
+def _flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def _source(db, tmp_path, name):
+    path = tmp_path / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(name.encode())
+    return db.source(str(path))
+
+
+def test_band_query_finds_up_to_max_distance(db, tmp_path, fake_hash):
+    sid = _source(db, tmp_path, "a/boot.img")
+    # по одному изменённому биту в семи байтах из восьми — один байт совпадает
+    near = _flip(BASE, [8 * i for i in range(MAX_DISTANCE)])
+    # по биту в каждом байте: ни один столбец b0..b7 не совпадает
+    far = _flip(BASE, [8 * i + 1 for i in range(8)])
+    db.add(sid, 0, ".jpg", _img(near))
+    db.add(sid, 100, ".jpg", _img(far))
+    db.add(sid, 200, ".jpg", _img(BASE, b"copy"))
+
+    found = [(d, row["offset"]) for d, row in db.similar(BASE, MAX_DISTANCE)]
+    assert found == [(0, 200), (MAX_DISTANCE, 0)]
+    assert [row["offset"] for _, row in db.similar(BASE, 3)] == [200]
+    with pytest.raises(ValueError):
+        db.similar(BASE, MAX_DISTANCE + 1)
+
+
+def test_add_is_idempotent_and_exact(db, tmp_path, fake_hash):
+    sid = _source(db, tmp_path, "a/boot.img")
+    data = _img(BASE)
+    db.add(sid, 0, ".jpg", data, "logo.jpg")
+    db.add(sid, 0, ".jpg", data, "logo.jpg")  # повторный проход (--resume)
+    assert len(db.exact(hashlib.sha256(data).hexdigest())) == 1
+
+
+def test_diff_by_name_and_content(db, tmp_path, fake_hash):
+    a = _source(db, tmp_path, "a/boot.img")
+    b = _source(db, tmp_path, "b/boot.img")
+    db.add(a, 0, ".jpg", _img(BASE), "logo.jpg")
+    db.add(b, 0, ".jpg", _img(_flip(BASE, [3])), "logo.jpg")   # то же имя, чуть другая
+    db.add(a, 10, ".png", _img(0x1111))                         # безымянная, есть в B
+    db.add(b, 20, ".png", _img(0x1111))
+    db.add(a, 30, ".png", _img(0x0F0F0F0F0F0F0F0F))             # только в A
+    db.add(b, 40, ".png", _img(0x7070707070707070))             # только в B
+
+    changed, only_a, only_b = db.diff(a, b)
+    assert [(ra["name"], rb["name"], d) for ra, rb, d in changed] == [("logo.jpg", "logo.jpg", 1)]
+    assert [row["offset"] for row in only_a] == [30]
+    assert [row["offset"] for row in only_b] == [40]
+
+
+def test_same_basename_gets_unique_label(db, tmp_path):
+    a = _source(db, tmp_path, "a/boot.img")
+    b = _source(db, tmp_path, "b/boot.img")
+    c = _source(db, tmp_path, "c/b/boot.img")
+    labels = {row["id"]: row["label"] for row in db.db.execute("SELECT id, label FROM sources")}
+    assert labels == {a: "boot.img", b: "b/boot.img", c: f"boot.img#{c}"}
+    assert db.resolve_source("b/boot.img") == b
+    assert db.resolve_source(str(tmp_path / "c" / "b" / "boot.img")) == c
+    assert db.resolve_source(str(a)) == a
+    assert db.source(str(tmp_path / "a" / "boot.img")) == a  # тот же файл — та же запись
+
+
+def test_ambiguous_legacy_label(db, tmp_path):
+    a = _source(db, tmp_path, "a/boot.img")
+    b = _source(db, tmp_path, "b/boot.img")
+    db.db.execute("UPDATE sources SET label = 'boot.img'")  # база старой версии
+    with pytest.raises(KeyError):
+        db.resolve_source("boot.img")
+    assert {db.resolve_source(str(tmp_path / d / "boot.img")) for d in "ab"} == {a, b}
+
+
+def test_dhash_of_real_images(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+
+    def jpeg(shift):
+        img = Image.new("L", (90, 80))
+        img.putdata([min(255, (x * 3 + y + shift) % 256) for y in range(80) for x in range(90)])
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        return buf.getvalue()
+
+    recorder = open_catalog(str(tmp_path / "catalog.db"), str(tmp_path), label="build")
+    recorder.add(0, ".jpg", jpeg(0))
+    recorder.close()
+    cat = Catalog(str(tmp_path / "catalog.db"))
+    _, _, phash = catalog_module.image_info(jpeg(1))
+    assert phash is not None
+    assert len(cat.similar(phash)) == 1
+    row = cat.db.execute("SELECT width, height FROM images").fetchone()
+    assert (row["width"], row["height"]) == (90, 80)
+    cat.close()
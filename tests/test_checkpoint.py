@@ -0,0 +1,64 @@
+import json
+import threading
+
+import pytest
+
+from checkpoint import STOP_EXIT_CODE, Checkpoint, checkpoint_path, has_checkpoint
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(b"\0" * 4096)
+    return str(path)
+
+
+def test_save_and_load(tmp_path, dump):
+    cp = Checkpoint(str(tmp_path), dump, "multiext")
+    cp.update(offset=1234, count=2)
+    cp.emit("image_0000.jpg")
+    cp.save()
+    assert has_checkpoint(str(tmp_path), dump, "multiext")
+
+    restored = Checkpoint(str(tmp_path), dump, "multiext")
+    assert restored.load()
+    assert restored.state == {"offset": 1234, "count": 2}
+    assert restored.emitted == ["image_0000.jpg"]
+
+
+def test_load_rejects_other_tool_or_changed_input(tmp_path, dump):
+    Checkpoint(str(tmp_path), dump, "multiext").save()
+    assert not Checkpoint(str(tmp_path), dump, "multiextV2").load()
+
+    with open(dump, "ab") as f:
+        f.write(b"\1")
+    assert not Checkpoint(str(tmp_path), dump, "multiext").load()
+    assert not has_checkpoint(str(tmp_path), dump, "multiext")
+
+
+def test_clear_removes_file(tmp_path, dump):
+    cp = Checkpoint(str(tmp_path), dump, "multiext")
+    cp.save()
+    cp.clear()
+    assert not (tmp_path / ".extractor_checkpoint.json").exists()
+    cp.clear()  # повторная очистка не падает
+
+
+def test_not_resumable_writes_nothing(tmp_path):
+    cp = Checkpoint(str(tmp_path), None, "multiext", resumable=False)
+    cp.update(offset=10)
+    cp.save()
+    assert not cp.load()
+    assert not (tmp_path / ".extractor_checkpoint.json").exists()
+
+
+def test_stop_and_exit_saves_state(tmp_path, dump):
+    event = threading.Event()
+    cp = Checkpoint(str(tmp_path), dump, "multiext", stop_event=event)
+    event.set()
+    assert cp.stop_requested
+    with pytest.raises(SystemExit) as exc:
+        cp.stop_and_exit(offset=777)
+    assert exc.value.code == STOP_EXIT_CODE
+    with open(checkpoint_path(str(tmp_path)), encoding="utf-8") as f:
+        assert json.load(f)["state"]["offset"] == 777
@@ -0,0 +1,68 @@
+import io
+
+from datasource import FileSource, StreamSource, open_source
+
+CHUNK = 64
+
+
+def _stream(data, lookbehind=0):
+    return StreamSource(io.BytesIO(data), lookbehind=lookbehind, window=4 * CHUNK, chunk_size=CHUNK)
+
+
+def test_file_source(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(b"abc" + b"\xFF\xD8\xFF" + b"xyz")
+    src = open_source(str(path))
+    assert isinstance(src, FileSource)
+    assert src.find(b"\xFF\xD8\xFF", 0) == 3
+    assert src.find(b"\xFF\xD8\xFF", 0, 5) == -1
+    assert src.get(-5, 100) == path.read_bytes()
+    assert src.at_eof(9) and not src.at_eof(8)
+    src.close()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    src = FileSource(str(path))
+    assert src.find(b"x", 0) == -1
+    assert src.at_eof(0)
+    src.close()
+
+
+def test_stream_find_across_chunks():
+    data = bytes(CHUNK - 1) + b"MAGIC" + bytes(3 * CHUNK) + b"MAGIC"
+    src = _stream(data)
+    first = src.find(b"MAGIC", 0)
+    assert first == CHUNK - 1
+    assert src.find(b"MAGIC", first + 1) == len(data) - 5
+    assert src.find(b"MAGIC", len(data) - 4) == -1
+
+
+def test_stream_keeps_lookbehind():
+    name = b"logo.jpg"
+    data = bytes(10 * CHUNK) + name + b"\xFF\xD8\xFF" + bytes(CHUNK)
+    src = _stream(data, lookbehind=len(name))
+    pos = src.find(b"\xFF\xD8\xFF", 0)
+    assert pos == 10 * CHUNK + len(name)
+    # память ограничена: левее lookbehind уже отброшено
+    assert src.base > 0
+    assert src.get(pos - len(name), pos) == name
+
+
+def test_stream_bounded_find_does_not_release():
+    data = bytes(5 * CHUNK) + b"END"
+    src = _stream(data)
+    assert src.find(b"END", 0, 2 * CHUNK) == -1
+    assert src.base == 0
+    assert src.find(b"END", 2 * CHUNK - 3, 5 * CHUNK + 3) == 5 * CHUNK
+
+
+def test_stream_release_and_eof():
+    src = _stream(bytes(3 * CHUNK))
+    src.get(0, 2 * CHUNK)
+    src.release(CHUNK)
+    assert src.base == CHUNK
+    assert src.get(0, CHUNK + 4) == bytes(4)  # отброшенное уже не вернуть
+    assert not src.at_eof(3 * CHUNK - 1)
+    assert src.at_eof(3 * CHUNK)
@@ -0,0 +1,73 @@
+import io
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from entropy import (BLOCK_SIZE, FILL_ERASED, FILL_NONE, FILL_ZERO, HIGH_ENTROPY, REGION_SIZE,
+                     Triage, block_stats, layout_report, strict_check)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+class BytesSource:
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def get(self, start, end):
+        return self.data[max(0, start):min(end, self.size)]
+
+
+def _image(fmt, size=(16, 8)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (10, 120, 240)).save(buf, fmt)
+    return buf.getvalue()
+
+
+def test_block_stats_classes():
+    data = bytes(BLOCK_SIZE) + b"\xFF" * BLOCK_SIZE + os.urandom(BLOCK_SIZE) + b"tail"
+    entropy, fill = block_stats(data)
+    assert list(fill) == [FILL_ZERO, FILL_ERASED, FILL_NONE, FILL_NONE]
+    assert entropy[0] == 0.0 and entropy[1] == 0.0
+    assert entropy[2] > HIGH_ENTROPY
+    assert entropy[3] == pytest.approx(2.0)  # неполный блок: четыре разных байта
+
+
+def test_block_stats_empty():
+    entropy, fill = block_stats(b"")
+    assert len(entropy) == 0 and len(fill) == 0
+
+
+def test_triage_fill_and_high():
+    data = bytes(REGION_SIZE) + os.urandom(REGION_SIZE)
+    triage = Triage(BytesSource(data))
+    assert triage.is_fill(0, REGION_SIZE)
+    assert not triage.is_fill(REGION_SIZE - BLOCK_SIZE, REGION_SIZE + BLOCK_SIZE)
+    assert triage.is_high(REGION_SIZE + 100)
+    assert not triage.is_high(100)
+    entropy, fill = triage.full_map()
+    assert len(entropy) == 2 * REGION_SIZE // BLOCK_SIZE
+    assert "zero" in layout_report(entropy, fill) and "high" in layout_report(entropy, fill)
+
+
+@pytest.mark.parametrize("fmt,ext", [("JPEG", ".jpg"), ("PNG", ".png"), ("BMP", ".bmp")])
+def test_strict_check_accepts_real_images(fmt, ext):
+    data = _image(fmt)
+    assert strict_check(ext, data, len(data))
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png", ".bmp"])
+def test_strict_check_rejects_random_bytes(ext):
+    magic = {".jpg": b"\xFF\xD8\xFF", ".png": b"\x89PNG\r\n\x1a\n", ".bmp": b"BM"}[ext]
+    rng = np.random.default_rng(1)
+    head = magic + rng.integers(0, 256, 4096, dtype=np.uint8).tobytes()
+    assert not strict_check(ext, head, len(head))
+
+
+def test_strict_check_rejects_truncated_bmp():
+    data = _image("BMP")
+    assert strict_check(".bmp", data, None)  # поток: сколько осталось — неизвестно
+    assert not strict_check(".bmp", data, len(data) - 1)
+    assert not strict_check(".bmp", data[:20], None)
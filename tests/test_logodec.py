@@ -0,0 +1,109 @@
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from logodec import (HEADER_SIZE, MTK_MAGIC, SPLASH_MAGIC, decode_mtk_logo, decode_pixels,
+                     decode_splash, expand_rle24, guess_size, logo_size, parse_mtk_logo)
+
+
+def _rle24(pixels):
+    """Эталонный кодер RLE24: повторы от 2 пикселей, остальное литералами"""
+    out = bytearray()
+    i = 0
+    while i < len(pixels):
+        run = 1
+        while i + run < len(pixels) and run < 128 and pixels[i + run] == pixels[i]:
+            run += 1
+        if run > 1:
+            out += bytes([0x80 | (run - 1)]) + pixels[i]
+            i += run
+            continue
+        j = i
+        while j < len(pixels) and j - i < 128 and (j + 1 >= len(pixels) or pixels[j + 1] != pixels[j]):
+            j += 1
+        j = max(j, i + 1)
+        out += bytes([j - i - 1]) + b"".join(pixels[i:j])
+        i = j
+    return bytes(out)
+
+
+def _splash(width, height, img_type, body):
+    blocks = (len(body) + 511) // 512
+    header = SPLASH_MAGIC + struct.pack("<IIII", width, height, img_type, blocks)
+    return header.ljust(HEADER_SIZE, b"\0") + body.ljust(blocks * 512, b"\0")
+
+
+def _bgr_image(width, height):
+    rng = np.random.default_rng(7)
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    img[:, : width // 2] = (10, 20, 30)                    # длинные повторы
+    img[:, width // 2:] = rng.integers(0, 256, (height, width - width // 2, 3))  # литералы
+    return img
+
+
+def test_expand_rle24_matches_reference():
+    img = _bgr_image(300, 7)
+    pixels = [bytes(p) for p in img.reshape(-1, 3)]
+    decoded = expand_rle24(_rle24(pixels), len(pixels))
+    assert decoded.tobytes() == b"".join(pixels)
+
+
+def test_expand_rle24_truncated():
+    pixels = [b"\1\2\3"] * 10
+    with pytest.raises(ValueError):
+        expand_rle24(_rle24(pixels)[:-1], 10)
+    with pytest.raises(ValueError):
+        expand_rle24(_rle24(pixels), 11)
+
+
+def test_decode_splash_raw_and_rle():
+    img = _bgr_image(64, 16)
+    raw = _splash(64, 16, 0, img.tobytes())
+    rle = _splash(64, 16, 1, _rle24([bytes(p) for p in img.reshape(-1, 3)]))
+    expected = img[..., ::-1]
+    assert (decode_splash(raw) == expected).all()
+    assert (decode_splash(rle) == expected).all()
+    assert logo_size("splash", raw) == len(raw)
+    assert logo_size("splash", b"SPLASH!!" + bytes(16)) is None
+
+
+def test_decode_pixels_rgb565():
+    px = np.array([[0xF800, 0x07E0, 0x001F]], dtype="<u2")
+    rgb = decode_pixels(px.tobytes(), 3, 1, "rgb565")
+    assert rgb[0].tolist() == [[255, 0, 0], [0, 255, 0], [0, 0, 255]]
+
+
+def _mtk(images):
+    blobs = [zlib.compress(img) for img in images]
+    offsets = []
+    pos = 8 + 4 * len(blobs)
+    for blob in blobs:
+        offsets.append(pos)
+        pos += len(blob)
+    table = struct.pack(f"<II{len(blobs)}I", len(blobs), pos, *offsets) + b"".join(blobs)
+    return MTK_MAGIC + struct.pack("<I", len(table)) + bytes(HEADER_SIZE - 8) + table
+
+
+def test_mtk_logo_table_and_decode():
+    screen = np.full((320, 240, 4), (1, 2, 3, 255), dtype=np.uint8).tobytes()
+    odd = bytes(4 * 7)
+    data = _mtk([screen, odd])
+    assert len(parse_mtk_logo(data)) == 2
+    assert logo_size("mtk", data) == len(data)
+    images = decode_mtk_logo(data)
+    assert images[0][1].shape == (320, 240, 4)
+    assert images[0][1][0, 0].tolist() == [3, 2, 1, 255]  # BGRA -> RGBA
+    assert images[1][1] is None and images[1][2] == odd
+
+
+def test_mtk_magic_without_table_is_not_a_logo():
+    assert logo_size("mtk", MTK_MAGIC + bytes(HEADER_SIZE + 64)) is None
+
+
+def test_guess_size():
+    assert guess_size(1080 * 1920 * 4, 4) == (1080, 1920)
+    assert guess_size(100 * 50 * 2, 2, width=100) == (100, 50)
+    assert guess_size(7, 2) is None
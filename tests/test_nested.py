@@ -0,0 +1,91 @@
+import gzip
+import io
+
+import pytest
+
+import nested
+from datasource import StreamSource
+from nested import WorkQueue, open_container
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 МиБ, больше одной порции OUT_CHUNK
+
+
+class BytesSource:
+    """Источник в памяти с интерфейсом FileSource"""
+    seekable = True
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def get(self, start, end):
+        return self.data[max(0, start):min(end, self.size)]
+
+
+def _embedded(blob):
+    return b"junk" * 100 + blob + b"tail" * 100
+
+
+def test_gzip_reader_unpacks_embedded_stream():
+    data = _embedded(gzip.compress(PAYLOAD))
+    reader = open_container("gz", BytesSource(data), 400, max_out=len(PAYLOAD) * 2)
+    assert reader is not None
+    assert reader.read(10) == PAYLOAD[:10]
+    assert reader.read() == PAYLOAD[10:]
+
+
+def test_gzip_reader_respects_max_out():
+    data = gzip.compress(PAYLOAD)
+    reader = open_container("gz", BytesSource(data), 0, max_out=1000)
+    assert reader.read() == PAYLOAD[:1000]
+
+
+def test_gzip_reader_over_stream_source():
+    data = _embedded(gzip.compress(PAYLOAD))
+    src = StreamSource(io.BytesIO(data), chunk_size=4096)
+    reader = open_container("gz", src, 400, max_out=len(PAYLOAD), max_in=len(data) - 400)
+    assert reader.read() == PAYLOAD
+
+
+def test_false_gzip_magic_is_rejected():
+    # магия на месте, но зарезервированные биты флагов выставлены
+    assert open_container("gz", BytesSource(b"\x1f\x8b\x08\xe0" + bytes(64)), 0, 1024) is None
+    # флаги в порядке, но дальше не deflate
+    assert open_container("gz", BytesSource(b"\x1f\x8b\x08\x00" + b"\xff" * 64), 0, 1024) is None
+
+
+def test_lz4_frame_reader():
+    lz4_frame = pytest.importorskip("lz4.frame")
+    data = _embedded(lz4_frame.compress(PAYLOAD))
+    reader = open_container("lz4", BytesSource(data), 400, max_out=len(PAYLOAD))
+    assert reader is not None
+    assert reader.read() == PAYLOAD
+
+
+def test_lz4_legacy_reader():
+    lz4_block = pytest.importorskip("lz4.block")
+    block = lz4_block.compress(PAYLOAD, store_size=False)
+    blob = b"\x02\x21\x4c\x18" + len(block).to_bytes(4, "little") + block
+    reader = open_container("lz4l", BytesSource(_embedded(blob)), 400, max_out=len(PAYLOAD))
+    assert reader is not None
+    assert reader.read() == PAYLOAD
+
+
+def test_lz4_skipped_without_module(monkeypatch):
+    monkeypatch.setattr(nested, "lz4", None)
+    assert open_container("lz4", BytesSource(b"\x04\x22\x4d\x18" + bytes(64)), 0, 1024) is None
+
+
+def test_work_queue_runs_nested_submissions():
+    queue = WorkQueue(workers=2, max_pending=1)
+    done = []
+
+    def task(depth):
+        done.append(depth)
+        if depth < 3:
+            queue.submit(task, depth + 1)
+            queue.submit(task, depth + 1)
+
+    queue.submit(task, 0)
+    queue.shutdown()
+    assert len(done) == 1 + 2 + 4 + 8
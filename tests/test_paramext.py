@@ -0,0 +1,72 @@
+import io
+import tarfile
+
+from datasource import open_source
+from paramext import BLOCK, extract_param, find_archive, read_index
+
+JPEG = b"\xFF\xD8\xFF\xE0" + b"jpegdata" + b"\xFF\xD9"
+
+
+def _tar(files, fmt=tarfile.USTAR_FORMAT):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=fmt) as tar:
+        for name, data in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def _dump(tmp_path, data):
+    path = tmp_path / "param.bin"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_index_matches_tar(tmp_path):
+    files = [("logo.jpg", JPEG), ("booting_warning.jpg", JPEG * 100), ("empty.txt", b"")]
+    data = _tar(files)
+    src = open_source(_dump(tmp_path, data))
+    entries, end = read_index(src)
+    assert [(e.name, e.size) for e in entries] == [(n, len(d)) for n, d in files]
+    for entry, (_, payload) in zip(entries, files):
+        assert src.get(entry.offset, entry.offset + entry.size) == payload
+    # конец индекса — первый нулевой блок маркера конца архива
+    assert data[end:end + 2 * BLOCK] == bytes(2 * BLOCK)
+    src.close()
+
+
+def test_archive_after_garbage_and_long_names(tmp_path):
+    long_name = "dir/" + "x" * 120 + ".jpg"
+    data = b"\xAA" * (3 * BLOCK) + _tar([(long_name, JPEG)], tarfile.GNU_FORMAT)
+    src = open_source(_dump(tmp_path, data))
+    assert find_archive(src) == 3 * BLOCK
+    entries, _ = read_index(src)
+    assert [e.name for e in entries] == [long_name]
+    src.close()
+
+
+def test_no_archive(tmp_path):
+    src = open_source(_dump(tmp_path, b"\0" * 4096))
+    assert find_archive(src) == -1
+    assert read_index(src) == ([], -1)
+    src.close()
+
+
+def test_bad_checksum_ends_index(tmp_path):
+    data = bytearray(_tar([("a.jpg", JPEG), ("b.jpg", JPEG)]))
+    data[2 * BLOCK + 148] ^= 1  # контрольная сумма второго заголовка
+    src = open_source(_dump(tmp_path, bytes(data)))
+    entries, end = read_index(src)
+    assert [e.name for e in entries] == ["a.jpg"]
+    assert end == 2 * BLOCK
+    src.close()
+
+
+def test_extract_names_and_unindexed(tmp_path):
+    data = _tar([("../../evil.jpg", JPEG), ("sub/ok.jpg", JPEG)]) + b"name_logo.jpg" + JPEG
+    out = tmp_path / "out"
+    extract_param(_dump(tmp_path, data), str(out))
+    assert (out / "evil.jpg").read_bytes() == JPEG  # выход наверх отрезан
+    assert (out / "sub" / "ok.jpg").read_bytes() == JPEG
+    assert (out / "unindexed" / "name_logo.jpg").read_bytes() == JPEG
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import struct
+import tarfile
+
+from bootimg import BootImage, align
+from datasource import FileSource
+from paramext import BLOCK, read_index
+from repack import AVB_FOOTER, AVB_FOOTER_SIZE, repack_boot, repack_param
+
+PAGE = 2048
+
+
+def _tar(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.USTAR_FORMAT) as tar:
+        for name, data in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def _members(path):
+    with tarfile.open(path) as tar:
+        return {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+
+
+def _param(tmp_path, files, tail):
+    """Архив (tarfile добивает его нулями до 10 КиБ) и ещё tail нулей, как в разделе"""
+    data = _tar(files)
+    path = tmp_path / "param.bin"
+    path.write_bytes(data + bytes(tail))
+    return str(path)
+
+
+def _new_file(tmp_path, data, name="new.bin"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def _end_marker_intact(path):
+    src = FileSource(path)
+    _, end = read_index(src)
+    ok = src.get(end, end + 2 * BLOCK) == bytes(2 * BLOCK)
+    src.close()
+    return ok
+
+
+def test_param_same_slot(tmp_path):
+    files = [("logo.jpg", b"A" * 1000), ("last.jpg", b"B" * 10)]
+    path = _param(tmp_path, files, 0)
+    size = len(open(path, "rb").read())
+    assert repack_param(path, "logo.jpg", _new_file(tmp_path, b"C" * 1020))
+    assert len(open(path, "rb").read()) == size
+    assert _members(path) == {"logo.jpg": b"C" * 1020, "last.jpg": b"B" * 10}
+
+
+def test_param_grow_in_zero_tail_keeps_end_marker(tmp_path):
+    files = [("logo.jpg", b"A" * 1000), ("last.jpg", b"B" * 10)]
+    path = _param(tmp_path, files, 16 * BLOCK)
+    size = len(open(path, "rb").read())
+    assert repack_param(path, "logo.jpg", _new_file(tmp_path, b"C" * 7600))
+    assert len(open(path, "rb").read()) == size  # поместилось в хвост
+    assert _members(path) == {"logo.jpg": b"C" * 7600, "last.jpg": b"B" * 10}
+    assert _end_marker_intact(path)
+
+
+def test_param_grow_without_room_rewrites(tmp_path):
+    files = [("logo.jpg", b"A" * 1000), ("last.jpg", b"B" * 10)]
+    path = _param(tmp_path, files, 0)
+    size = len(open(path, "rb").read())
+    # свободных нулей ровно на 13 блоков, не считая маркера конца; нужно 14
+    assert repack_param(path, "logo.jpg", _new_file(tmp_path, b"C" * 8200))
+    assert len(open(path, "rb").read()) == size + align(8200, BLOCK) - align(1000, BLOCK)
+    assert _members(path) == {"logo.jpg": b"C" * 8200, "last.jpg": b"B" * 10}
+    assert _end_marker_intact(path)
+
+
+def test_param_shrink_and_output_copy(tmp_path):
+    files = [("logo.jpg", b"A" * 5000), ("last.jpg", b"B" * 10)]
+    path = _param(tmp_path, files, 0)
+    original = open(path, "rb").read()
+    out = str(tmp_path / "out.bin")
+    assert repack_param(path, "logo.jpg", _new_file(tmp_path, b"C" * 100), out)
+    assert open(path, "rb").read() == original  # исходник не тронут
+    assert _members(out) == {"logo.jpg": b"C" * 100, "last.jpg": b"B" * 10}
+
+
+def test_param_missing_member(tmp_path):
+    path = _param(tmp_path, [("logo.jpg", b"A")], 0)
+    assert not repack_param(path, "nope.jpg", _new_file(tmp_path, b"C"))
+
+
+def _boot_v0(kernel, ramdisk, tail=0, avb=False):
+    header = bytearray(PAGE)
+    header[:8] = b"ANDROID!"
+    struct.pack_into("<I", header, 8, len(kernel))
+    struct.pack_into("<I", header, 16, len(ramdisk))
+    struct.pack_into("<I", header, 36, PAGE)
+    image = bytes(header)
+    for part in (kernel, ramdisk):
+        image += part.ljust(align(len(part), PAGE), b"\0")
+    if not avb:
+        return image + bytes(tail)
+    # образ, за ним vbmeta, нули и футер AVB в последних 64 байтах раздела
+    original_size = len(image)
+    vbmeta = b"AVB0" + bytes(252)
+    body = image + vbmeta
+    footer = AVB_FOOTER + struct.pack(">IIQQQ", 1, 0, original_size, original_size, len(vbmeta))
+    return body + bytes(tail) + footer.ljust(AVB_FOOTER_SIZE, b"\0")
+
+
+def _components(path):
+    data = open(path, "rb").read()
+    boot = BootImage(data[:PAGE])
+    return data, {c.name: data[c.offset:c.offset + c.size] for c in boot.components()}
+
+
+def test_boot_grow_kernel_updates_header_and_id(tmp_path):
+    path = str(tmp_path / "boot.img")
+    with open(path, "wb") as f:
+        f.write(_boot_v0(b"K" * 3000, b"R" * 100, tail=4 * PAGE))
+    assert repack_boot(path, "kernel", _new_file(tmp_path, b"N" * 6000))
+    data, parts = _components(path)
+    assert parts["kernel"] == b"N" * 6000
+    assert parts["ramdisk"] == b"R" * 100
+    sha = hashlib.sha1()
+    for name in ("kernel", "ramdisk", "second"):
+        sha.update(parts[name])
+        sha.update(struct.pack("<I", len(parts[name])))
+    assert data[576:596] == sha.digest()
+
+
+def _vbmeta_ok(path):
+    data = open(path, "rb").read()
+    footer = data[-AVB_FOOTER_SIZE:]
+    assert footer[:4] == AVB_FOOTER
+    original_size, vbmeta_offset = struct.unpack(">QQ", footer[12:28])
+    return data[vbmeta_offset:vbmeta_offset + 4] == b"AVB0" and original_size == vbmeta_offset
+
+
+def test_boot_avb_footer_follows_shift(tmp_path):
+    path = str(tmp_path / "boot.img")
+    with open(path, "wb") as f:
+        f.write(_boot_v0(b"K" * 3000, b"R" * 100, tail=4 * PAGE, avb=True))
+    assert repack_boot(path, "kernel", _new_file(tmp_path, b"N" * 6000))
+    assert _vbmeta_ok(path)
+    assert repack_boot(path, "kernel", _new_file(tmp_path, b"S" * 10))
+    assert _vbmeta_ok(path)
+    assert _components(path)[1]["ramdisk"] == b"R" * 100
+
+
+def test_boot_avb_footer_after_rewrite(tmp_path):
+    path = str(tmp_path / "boot.img")
+    with open(path, "wb") as f:
+        f.write(_boot_v0(b"K" * 3000, b"R" * 100, avb=True))
+    size = len(open(path, "rb").read())
+    assert repack_boot(path, "ramdisk", _new_file(tmp_path, b"D" * 9000))
+    assert len(open(path, "rb").read()) > size  # места не было — файл вырос
+    assert _vbmeta_ok(path)
+    assert _components(path)[1]["ramdisk"] == b"D" * 9000
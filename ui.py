@@ -4,10 +4,8 @@
 import sys
 import os
 import threading
-import subprocess
 import datetime
-import time
-import signal
+import itertools
 
 from PyQt5.QtWidgets import (
     QApplication,
@@ -20,7 +18,12 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QComboBox,
     QTextEdit,
-    QProgressBar
+    QProgressBar,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView
 )
 
 from PyQt5.QtGui import (
@@ -33,9 +36,15 @@ from PyQt5.QtGui import (
 
 from PyQt5.QtCore import (
     Qt,
-    QTimer
+    QTimer,
+    QObject,
+    QProcess,
+    pyqtSignal
 )
 
+from checkpoint import has_checkpoint, STOP_EXIT_CODE
+import extractd
+
 # Если XDG_RUNTIME_DIR не задан (на Termux/Android) — установить
 if not os.environ.get("XDG_RUNTIME_DIR"):
     os.environ["XDG_RUNTIME_DIR"] = "/data/data/com.termux/files/usr/tmp/runtime-u0_a225"
@@ -93,66 +102,367 @@ class WallpaperBackground(QWidget):
             pass
 
 
-class WaitWindow(QWidget):
-    """Окно ожидания с горизонтальной полоской и кнопкой Cancel (без blur)."""
-    def __init__(self, message="Пожалуйста, подождите..."):
+# Состояния задачи в очереди: (по-русски, по-английски)
+JOB_STATES = {
+    "queued": ("в очереди", "queued"),
+    "running": ("выполняется", "running"),
+    "done": ("готово", "done"),
+    "stopped": ("остановлено", "stopped"),
+    "failed": ("ошибка", "failed"),
+}
+
+# Кнопка -> скрипт; имя скрипта без .py — это и инструмент extractd
+TOOL_SCRIPTS = {
+    "multiext": "multiext.py",
+    "multiextV2": "multiextV2.py",
+    "recext": "recext.py",
+    "bootext": "bootext.py",
+    "paramext": "paramext.py",
+}
+
+
+class JobSignals(QObject):
+    """Сигналы из рабочих потоков: Qt доставляет их в GUI-поток через очередь событий"""
+    line = pyqtSignal(int, str)       # задача, строка вывода
+    progress = pyqtSignal(int, int)   # задача, проценты
+    accepted = pyqtSignal(int, int)   # задача, номер задачи в extractd
+    finished = pyqtSignal(int, int)   # задача, код завершения
+    message = pyqtSignal(str)         # сообщение в общий журнал
+
+
+class QueueJob:
+    def __init__(self, job_id, tool, input_file, output_dir, resume):
+        self.id = job_id
+        self.tool = tool
+        self.input = input_file
+        self.output = output_dir
+        self.resume = resume
+        self.state = "queued"
+        self.code = None
+        self.lines = []
+        self.daemon_id = None   # номер в extractd, когда задача выполняется там
+        self.process = None     # QProcess, когда демона нет
+        self.partial = ""       # недочитанная строка вывода QProcess
+        self.cancelled = False
+        self.log_window = None
+
+
+class JobLogWindow(QWidget):
+    """Журнал одной задачи; дописывается, пока задача идёт"""
+    def __init__(self, job):
         super().__init__(None, Qt.Window)
-        self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint | Qt.CustomizeWindowHint)
-        self.setFixedSize(500, 120)
-        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setWindowTitle(f"#{job.id} {job.tool} — {os.path.basename(job.input)}")
+        self.resize(640, 420)
+        self.text = QTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setStyleSheet("font-family: monospace; font-size: 12px;")
+        self.text.setPlainText("\n".join(job.lines))
+        layout = QVBoxLayout()
+        layout.addWidget(self.text)
+        self.setLayout(layout)
 
-        self.setStyleSheet("""
-            background-color: rgba(10, 30, 60, 160);
-            color: white;
-            border-radius: 12px;
-        """)
-        self.center()
+    def append(self, line):
+        self.text.append(line)
+
+
+class JobQueue(QWidget):
+    """Очередь задач: несколько файлов и инструментов, до limit задач одновременно.
+
+    Задачи выполняются в extractd, если он подключён, иначе отдельными
+    процессами через QProcess. Вывод и прогресс приходят сигналами, так что
+    цикл событий Qt нигде не блокируется.
+    """
+    activity_changed = pyqtSignal(bool)
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.lang = "ru"
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self.daemon_ready = False
+        self.signals = JobSignals()
+        self.signals.line.connect(self._on_line)
+        self.signals.progress.connect(self._on_progress)
+        self.signals.accepted.connect(self._on_accepted)
+        self.signals.finished.connect(self._on_finished)
 
         layout = QVBoxLayout()
-        layout.setContentsMargins(12, 12, 12, 12)
-
-        self.label = QLabel(message)
-        self.label.setAlignment(Qt.AlignCenter)
-        self.label.setStyleSheet("color: white;")
-        layout.addWidget(self.label)
-
-        self.progress = QProgressBar()
-        self.progress.setRange(0, 0)  # бесконечный индикатор
-        self.progress.setTextVisible(False)
-        self.progress.setFixedHeight(18)
-        self.progress.setStyleSheet("""
-            QProgressBar {
-                border-radius: 6px;
-                background-color: rgba(0,0,0,60);
-            }
-            QProgressBar::chunk {
-                background-color: rgba(80,150,255,200);
-                width: 40px;
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["#", "Задача", "Состояние", "Прогресс"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.table.setColumnWidth(3, 110)
+        self.table.setFixedHeight(170)
+        self.table.setStyleSheet("""
+            QTableWidget {
+                background-color: rgba(5, 12, 28, 110);
+                color: white;
+                border-radius: 8px;
+                gridline-color: rgba(255,255,255,30);
             }
-        """)
-        layout.addWidget(self.progress)
-
-        self.cancel_btn = QPushButton("Cancel")
-        self.cancel_btn.setFixedHeight(32)
-        self.cancel_btn.setStyleSheet("""
-            QPushButton {
-                background-color: rgba(20,70,160,120);
+            QHeaderView::section {
+                background-color: rgba(10, 40, 120, 160);
                 color: white;
-                border-radius:6px;
-                border: 1px solid rgba(255,255,255,10);
-                padding: 6px 10px;
+                border: none;
+                padding: 2px;
             }
-            QPushButton:hover { background-color: rgba(40,100,200,160); }
-            QPushButton:pressed { background-color: rgba(10,40,120,200); }
         """)
-        layout.addWidget(self.cancel_btn)
-
+        self.table.cellDoubleClicked.connect(lambda row, _: self.show_log(self._job_at(row)))
+        layout.addWidget(self.table)
+
+        controls = QHBoxLayout()
+        self.limit_label = QLabel("Одновременно:")
+        self.limit_spin = QSpinBox()
+        cpus = os.cpu_count() or 1
+        self.limit_spin.setRange(1, max(2 * cpus, 4))
+        self.limit_spin.setValue(cpus)
+        self.limit_spin.valueChanged.connect(lambda _: self._pump())
+        self.cancel_btn = QPushButton("Отменить")
+        self.log_btn = QPushButton("Журнал")
+        self.clear_btn = QPushButton("Убрать завершённые")
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        self.log_btn.clicked.connect(lambda: [self.show_log(job) for job in self._selected()])
+        self.clear_btn.clicked.connect(self.clear_finished)
+        controls.addWidget(self.limit_label)
+        controls.addWidget(self.limit_spin)
+        controls.addStretch(1)
+        for btn in (self.cancel_btn, self.log_btn, self.clear_btn):
+            btn.setFixedHeight(30)
+            controls.addWidget(btn)
+        layout.addLayout(controls)
         self.setLayout(layout)
 
-    def center(self):
-        screen = QApplication.primaryScreen().geometry()
-        self.move((screen.width() - self.width()) // 2,
-                  (screen.height() - self.height()) // 2)
+    # --- очередь ---
+    def add(self, tool, input_file, output_dir, resume=False):
+        job = QueueJob(next(self._ids), tool, input_file, output_dir, resume)
+        self.jobs[job.id] = job
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(str(job.id)))
+        self.table.setItem(row, 1, QTableWidgetItem(f"{tool}: {os.path.basename(input_file)}"))
+        self.table.setItem(row, 2, QTableWidgetItem(""))
+        bar = QProgressBar()
+        bar.setRange(0, 100)
+        bar.setValue(0)
+        bar.setTextVisible(False)
+        self.table.setCellWidget(row, 3, bar)
+        self._show_state(job)
+        self.log(f"➕ #{job.id} {tool}: {input_file} → {output_dir}" + (" (продолжение)" if resume else ""))
+        self._pump()
+        return job
+
+    def has_active(self):
+        return any(job.state in ("queued", "running") for job in self.jobs.values())
+
+    def _pump(self):
+        running = sum(1 for job in self.jobs.values() if job.state == "running")
+        for job in self.jobs.values():
+            if running >= self.limit_spin.value():
+                break
+            if job.state == "queued":
+                self._start(job)
+                running += 1
+        self.activity_changed.emit(self.has_active())
+
+    def _start(self, job):
+        job.state = "running"
+        self._show_state(job)
+        bar = self._bar(job)
+        if bar is not None:
+            bar.setRange(0, 0)  # бегущая полоска, пока нет прогресса
+        os.makedirs(job.output, exist_ok=True)
+        if self.daemon_ready:
+            threading.Thread(target=self._run_in_daemon, args=(job,), daemon=True).start()
+        else:
+            self._run_process(job)
+
+    def _run_in_daemon(self, job):
+        """Рабочий поток: задача в extractd, события сокета → сигналы"""
+        request = {"cmd": "run", "tool": job.tool, "input": job.input, "output": job.output,
+                   "options": {"resume": True} if job.resume else {}}
+        code = 1
+        try:
+            for event in extractd.call(request):
+                kind = event.get("event")
+                if kind == "queued":
+                    self.signals.accepted.emit(job.id, event["job"])
+                elif kind == "log":
+                    self.signals.line.emit(job.id, event["text"])
+                elif kind == "progress" and event.get("size"):
+                    self.signals.progress.emit(job.id, 100 * event["offset"] // event["size"])
+                elif kind == "error":
+                    self.signals.line.emit(job.id, f"❌ {event['message']}")
+                elif kind == "done":
+                    code = event["code"]
+        except Exception as e:
+            self.signals.line.emit(job.id, f"⚠ Ошибка связи с фоновым сервисом: {e}")
+        self.signals.finished.emit(job.id, code)
+
+    def _run_process(self, job):
+        """Без демона: отдельный python через QProcess (асинхронно, без потоков)"""
+        args = ["-u", os.path.join(BASE_DIR, TOOL_SCRIPTS[job.tool]), job.input, job.output]
+        if job.resume:
+            args.append("--resume")
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        process.readyReadStandardOutput.connect(lambda: self._read_process(job))
+        process.finished.connect(lambda code, status: self._on_finished(
+            job.id, code if status == QProcess.NormalExit else (STOP_EXIT_CODE if job.cancelled else 1)))
+        process.errorOccurred.connect(lambda error: self._process_error(job, error))
+        job.process = process
+        self._on_line(job.id, f"▶ Команда: {sys.executable or 'python3'} {' '.join(args)}")
+        process.start(sys.executable or "python3", args)
+
+    def _process_error(self, job, error):
+        if error == QProcess.FailedToStart:
+            # finished в этом случае не придёт
+            self._on_line(job.id, "⚠ Не удалось запустить python")
+            self._on_finished(job.id, 1)
+
+    def _read_process(self, job):
+        text = job.partial + bytes(job.process.readAllStandardOutput()).decode("utf-8", "replace")
+        lines = text.split("\n")
+        job.partial = lines.pop()
+        for line in lines:
+            self._on_line(job.id, line.rstrip("\r"))
+
+    # --- отмена ---
+    def cancel(self, job):
+        if job.state == "queued":
+            job.cancelled = True
+            self._on_finished(job.id, STOP_EXIT_CODE)
+            return
+        if job.state != "running" or job.cancelled:
+            return
+        job.cancelled = True
+        self.log(f"🛑 Останавливаю #{job.id}...")
+        if job.process is not None:
+            # SIGTERM — чистая остановка с контрольной точкой; не помогло — kill
+            job.process.terminate()
+            QTimer.singleShot(3000, lambda p=job.process: p.kill() if p.state() != QProcess.NotRunning else None)
+        elif job.daemon_id is not None:
+            self._stop_in_daemon(job.daemon_id)
+        # иначе демон ещё не принял задачу — остановим в _on_accepted
+
+    def _stop_in_daemon(self, daemon_id):
+        try:
+            extractd.stop_job(daemon_id)
+        except Exception as e:
+            self.log(f"⚠ Ошибка при остановке: {e}")
+
+    def cancel_selected(self):
+        for job in self._selected():
+            self.cancel(job)
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+
+    def clear_finished(self):
+        for job_id in [j.id for j in self.jobs.values() if j.state not in ("queued", "running")]:
+            self.table.removeRow(self._row(self.jobs[job_id]))
+            del self.jobs[job_id]
+
+    # --- события задач (GUI-поток) ---
+    def _on_line(self, job_id, text):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.lines.append(text)
+        self.log(f"[#{job_id}] {text}")
+        if job.log_window is not None:
+            job.log_window.append(text)
+
+    def _on_progress(self, job_id, percent):
+        job = self.jobs.get(job_id)
+        bar = self._bar(job) if job is not None else None
+        if bar is not None:
+            bar.setRange(0, 100)
+            bar.setValue(percent)
+
+    def _on_accepted(self, job_id, daemon_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.daemon_id = daemon_id
+        if job.cancelled:
+            self._stop_in_daemon(daemon_id)
+
+    def _on_finished(self, job_id, code):
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in ("queued", "running"):
+            return
+        if job.partial:
+            self._on_line(job_id, job.partial)
+            job.partial = ""
+        job.code = code
+        job.state = "done" if code == 0 else "stopped" if code == STOP_EXIT_CODE else "failed"
+        job.process = None
+        self._show_state(job)
+        bar = self._bar(job)
+        if bar is not None:
+            bar.setRange(0, 100)
+            bar.setValue(100 if code == 0 else bar.value())
+        if code == 0:
+            self.log(f"✅ #{job_id} {job.tool}: готово — {job.output}")
+        elif code == STOP_EXIT_CODE:
+            self.log(f"⏸ #{job_id} остановлено, контрольная точка сохранена — можно продолжить позже.")
+        else:
+            self.log(f"❌ #{job_id} {job.tool} завершился с кодом {code}")
+        self._pump()
+
+    # --- таблица ---
+    def _row(self, job):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).text() == str(job.id):
+                return row
+        return -1
+
+    def _job_at(self, row):
+        item = self.table.item(row, 0)
+        return self.jobs.get(int(item.text())) if item is not None else None
+
+    def _selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        return [job for job in (self._job_at(row) for row in rows) if job is not None]
+
+    def _bar(self, job):
+        row = self._row(job)
+        return self.table.cellWidget(row, 3) if row >= 0 else None
+
+    def _show_state(self, job):
+        row = self._row(job)
+        if row >= 0:
+            self.table.item(row, 2).setText(JOB_STATES[job.state][0 if self.lang == "ru" else 1])
+
+    def show_log(self, job):
+        if job is None:
+            return
+        if job.log_window is None:
+            job.log_window = JobLogWindow(job)
+        job.log_window.show()
+        job.log_window.raise_()
+
+    def set_language(self, lang):
+        self.lang = lang
+        ru = lang == "ru"
+        self.table.setHorizontalHeaderLabels(["#", "Задача" if ru else "Job", "Состояние" if ru else "State",
+                                              "Прогресс" if ru else "Progress"])
+        self.limit_label.setText("Одновременно:" if ru else "Concurrent:")
+        self.cancel_btn.setText("Отменить" if ru else "Cancel")
+        self.log_btn.setText("Журнал" if ru else "Log")
+        self.clear_btn.setText("Убрать завершённые" if ru else "Clear finished")
+        for job in self.jobs.values():
+            self._show_state(job)
 
 
 class ExtractorGUI(QWidget):
@@ -160,17 +470,15 @@ class ExtractorGUI(QWidget):
         super().__init__()
 
         self.LANG = "ru"
-        self.file_path = ""
+        self.file_paths = []
         self.folder_path = ""
-        self.process = None
-        self.process_pg = None
+        # фоновый сервис извлечения (extractd.py): задачи без запуска нового python
+        self.daemon_started = False
 
         wallpaper_path = os.path.join(BASE_DIR, "wallpaper.jpg")
         # создаём фон и показываем его
         self.bg = WallpaperBackground(wallpaper_path)
 
-        self.wait_window = None
-
         # Основное окно — без рамки, полупрозрачное тёмно-синее
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
@@ -178,10 +486,26 @@ class ExtractorGUI(QWidget):
         self._old_pos = None
 
         self.init_ui()
+        threading.Thread(target=self._connect_daemon, daemon=True).start()
+
+    def _connect_daemon(self):
+        """Подключиться к extractd или запустить его; без него задачи идут через QProcess"""
+        message = self.queue.signals.message
+        try:
+            if extractd.is_running():
+                self.queue.daemon_ready = True
+            elif extractd.start_daemon(workers=os.cpu_count()):
+                # пул демона не меньше лимита очереди, иначе задачи ждали бы дважды
+                self.queue.daemon_ready = True
+                self.daemon_started = True
+        except Exception as e:
+            message.emit(f"⚠ Фоновый сервис недоступен: {e}")
+        if self.queue.daemon_ready:
+            message.emit("⚡ Фоновый сервис извлечения подключён")
 
     def init_ui(self):
         self.setWindowTitle("Samsung Electronics Extractor 31 Pro")
-        self.setFixedSize(520, 640)
+        self.setFixedSize(520, 900)
 
         # Тёмно-синий полупрозрачный фон
         self.setStyleSheet(f"""
@@ -224,13 +548,14 @@ class ExtractorGUI(QWidget):
         layout.addLayout(lang_layout)
 
         # Buttons
-        self.file_btn = QPushButton("Выбрать файл")
+        self.file_btn = QPushButton("Выбрать файлы")
         self.folder_btn = QPushButton("Выбрать папку")
         self.extract_btn = QPushButton("Извлечь картинки")
         self.extract_v2_btn = QPushButton("Извлечь из файла картинки (улучшенная)")
         self.recovery_btn = QPushButton("Извлечь recovery")
         self.boot_btn = QPushButton("Извлечь boot")
-        self.stop_btn = QPushButton("Остановить извлечение")
+        self.param_btn = QPushButton("Извлечь param")
+        self.stop_btn = QPushButton("Остановить все")
         self.restart_btn = QPushButton("Перезапустить Extractor")
         self.exit_btn = QPushButton("Выйти")
 
@@ -256,8 +581,9 @@ class ExtractorGUI(QWidget):
      
 
         for btn in [self.file_btn, self.folder_btn, self.extract_btn, self.extract_v2_btn,
-                    self.recovery_btn, self.boot_btn, self.stop_btn, self.restart_btn, self.exit_btn]:
-            btn.setFixedHeight(42)
+                    self.recovery_btn, self.boot_btn, self.param_btn, self.stop_btn, self.restart_btn,
+                    self.exit_btn]:
+            btn.setFixedHeight(36)
             btn.setStyleSheet(btn_style)
             layout.addWidget(btn)
 
@@ -273,7 +599,12 @@ class ExtractorGUI(QWidget):
             font-size: 12px;
             padding: 8px;
         """)
-        self.log_box.setFixedHeight(200)
+        self.log_box.setFixedHeight(150)
+
+        self.queue = JobQueue(self.log)
+        self.queue.signals.message.connect(self.log)
+        self.queue.activity_changed.connect(self.stop_btn.setEnabled)
+        layout.addWidget(self.queue)
         layout.addWidget(self.log_box)
 
         footer = QLabel("© Samsung Electronics Extractor 2025")
@@ -286,10 +617,11 @@ class ExtractorGUI(QWidget):
         # Connects
         self.file_btn.clicked.connect(self.select_file)
         self.folder_btn.clicked.connect(self.select_folder)
-        self.extract_btn.clicked.connect(lambda: self.run_script("multiext.py", "Извлечение картинок завершено!"))
-        self.extract_v2_btn.clicked.connect(lambda: self.run_script("multiextV2.py", "Извлечение картинок (улучшенная) завершено!"))
-        self.recovery_btn.clicked.connect(lambda: self.run_script("recext.py", "Извлечение recovery завершено!"))
-        self.boot_btn.clicked.connect(lambda: self.run_script("bootext.py", "Извлечение boot завершено!"))
+        self.extract_btn.clicked.connect(lambda: self.enqueue("multiext"))
+        self.extract_v2_btn.clicked.connect(lambda: self.enqueue("multiextV2"))
+        self.recovery_btn.clicked.connect(lambda: self.enqueue("recext"))
+        self.boot_btn.clicked.connect(lambda: self.enqueue("bootext"))
+        self.param_btn.clicked.connect(lambda: self.enqueue("paramext"))
         self.stop_btn.clicked.connect(self.stop_extraction)
         self.restart_btn.clicked.connect(self.restart_extractor)
         self.exit_btn.clicked.connect(self.confirm_exit)
@@ -337,12 +669,13 @@ class ExtractorGUI(QWidget):
             pass
 
     def select_file(self):
-        path, _ = QFileDialog.getOpenFileName(self,
-                                              "Выбрать файл" if self.LANG == "ru" else "Select File",
-                                              "/storage/emulated/0")
-        if path:
-            self.file_path = path
-            self.log(f"📄 Файл выбран: {path}")
+        paths, _ = QFileDialog.getOpenFileNames(self,
+                                                "Выбрать файлы" if self.LANG == "ru" else "Select Files",
+                                                "/storage/emulated/0")
+        if paths:
+            self.file_paths = paths
+            for path in paths:
+                self.log(f"📄 Файл выбран: {path}")
 
     def select_folder(self):
         path = QFileDialog.getExistingDirectory(self,
@@ -352,153 +685,47 @@ class ExtractorGUI(QWidget):
             self.folder_path = path
             self.log(f"📁 Папка выбрана: {path}")
 
-    def _set_running_state(self, running: bool):
-        for btn in (self.extract_btn, self.extract_v2_btn, self.recovery_btn, self.boot_btn):
-            try:
-                btn.setEnabled(not running)
-            except Exception:
-                pass
-        try:
-            self.stop_btn.setEnabled(running)
-            self.file_btn.setEnabled(not running)
-            self.folder_btn.setEnabled(not running)
-        except Exception:
-            pass
+    def _job_output(self, input_file, tool):
+        """Своя папка на задачу: инструменты и файлы не мешают друг другу и контрольным точкам"""
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        return os.path.join(self.folder_path, f"{stem}_{tool}")
 
-    def run_script(self, script_name, finish_msg):
-        # Проверка выбора файла и папки
-        if not getattr(self, "file_path", "") or not getattr(self, "folder_path", ""):
+    def enqueue(self, tool):
+        # Проверка выбора файлов и папки
+        if not self.file_paths or not self.folder_path:
             QMessageBox.warning(self, "Ошибка" if self.LANG == "ru" else "Error",
                                 "Выберите файл и папку" if self.LANG == "ru" else "Select file and folder")
             return
 
-        script_path = os.path.join(BASE_DIR, script_name)
+        script_path = os.path.join(BASE_DIR, TOOL_SCRIPTS[tool])
         if not os.path.exists(script_path):
-            self.log(f"❌ Скрипт не найден: {script_name} (ожидалось {script_path})")
-            return
-
-        # Если уже запущен процесс
-        if self.process and self.process.poll() is None:
-            self.log("⚠ Процесс уже запущен — сначала остановите его или дождитесь завершения.")
+            self.log(f"❌ Скрипт не найден: {TOOL_SCRIPTS[tool]} (ожидалось {script_path})")
             return
 
-        # Создать окно ожидания
-        self.wait_window = WaitWindow(f"{finish_msg}... Подождите")
-        try:
-            self.wait_window.cancel_btn.clicked.connect(self.stop_extraction)
-            self.wait_window.show()
-        except Exception:
-            pass
+        # Предложить продолжить прерванные извлечения — один вопрос на все файлы
+        jobs = [(path, self._job_output(path, tool)) for path in self.file_paths]
+        interrupted = [path for path, out in jobs if has_checkpoint(out, path, tool)]
+        resume = False
+        if interrupted:
+            reply = QMessageBox.question(self,
+                                         "Продолжить?" if self.LANG == "ru" else "Resume?",
+                                         f"Найдены контрольные точки прерванного извлечения ({len(interrupted)}). "
+                                         "Продолжить с них?"
+                                         if self.LANG == "ru" else
+                                         f"Checkpoints of interrupted extractions were found ({len(interrupted)}). "
+                                         "Resume from them?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            resume = reply == QMessageBox.Yes
 
-        # Определение интерпретатора python
-        python_exec = sys.executable or "python3"
-        cmd = [python_exec, script_path, self.file_path, self.folder_path]
         self.log("────────────────────────────────────────")
-        self.log(f"▶ Команда: {' '.join(cmd)}")
-
-        def target():
-            try:
-                preexec = None
-                # использовать os.setsid только на POSIX
-                if os.name == "posix" and hasattr(os, "setsid"):
-                    preexec = os.setsid
-
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1,
-                    preexec_fn=preexec
-                )
-                try:
-                    # попытаться получить pgid
-                    if hasattr(os, "getpgid"):
-                        self.process_pg = os.getpgid(self.process.pid)
-                    else:
-                        self.process_pg = None
-                except Exception:
-                    self.process_pg = None
-
-                QTimer.singleShot(0, lambda: self._set_running_state(True))
-
-                # Читать вывод в реальном времени
-                for line in iter(self.process.stdout.readline, ''):
-                    if not line:
-                        break
-                    stripped = line.rstrip('\n')
-                    QTimer.singleShot(0, lambda s=stripped: self.log(s))
-
-                self.process.wait()
-                code = self.process.returncode
-                if code == 0:
-                    QTimer.singleShot(0, lambda: self.log(f"✅ {finish_msg}"))
-                else:
-                    QTimer.singleShot(0, lambda: self.log(f"❌ Скрипт завершился с кодом {code}"))
-            except Exception as e:
-                QTimer.singleShot(0, lambda: self.log(f"⚠ Ошибка при запуске: {e}"))
-            finally:
-                try:
-                    if getattr(self.process, "stdout", None):
-                        try:
-                            self.process.stdout.close()
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-                self.process = None
-                self.process_pg = None
-                QTimer.singleShot(0, lambda: self._set_running_state(False))
-                QTimer.singleShot(0, lambda: (self.wait_window.close() if self.wait_window else None))
-                self.wait_window = None
-
-        threading.Thread(target=target, daemon=True).start()
+        for path, out in jobs:
+            self.queue.add(tool, path, out, resume=resume and path in interrupted)
 
     def stop_extraction(self):
-        proc = getattr(self, "process", None)
-        pg = getattr(self, "process_pg", None)
-        if proc and proc.poll() is None:
-            self.log("🛑 Останавливаю процесс...")
-            try:
-                proc.terminate()
-            except Exception as e:
-                self.log(f"⚠ Ошибка при terminate(): {e}")
-
-            waited = 0.0
-            timeout = 3.0
-            while waited < timeout:
-                if proc.poll() is not None:
-                    break
-                time.sleep(0.1)
-                waited += 0.1
-
-            if proc.poll() is None:
-                self.log("⚠ Процесс не завершился — выполняю принудительное завершение группы процессов...")
-                try:
-                    if pg and os.name == "posix":
-                        os.killpg(pg, signal.SIGKILL)
-                    else:
-                        proc.kill()
-                except Exception as e:
-                    self.log(f"⚠ Ошибка при принудительном завершении: {e}")
-
-            try:
-                proc.wait(timeout=2)
-            except Exception:
-                pass
-
-            self.log("🛑 Извлечение остановлено.")
-            self.process = None
-            self.process_pg = None
-            self._set_running_state(False)
-            if self.wait_window:
-                try:
-                    self.wait_window.close()
-                except Exception:
-                    pass
-                self.wait_window = None
+        if self.queue.has_active():
+            self.queue.cancel_all()
         else:
-            self.log("⚠ Нет активного процесса для остановки.")
+            self.log("⚠ Нет активных задач для остановки.")
 
     def restart_extractor(self):
         try:
@@ -521,22 +748,30 @@ class ExtractorGUI(QWidget):
                 self.bg.stop()
             except Exception:
                 pass
-            if self.process and self.process.poll() is None:
-                self.stop_extraction()
+            if self.queue.has_active():
+                self.queue.cancel_all()
+            if self.daemon_started:
+                # сервис запускали мы — мы его и гасим (задачи остановятся с контрольной точкой)
+                try:
+                    list(extractd.call({"cmd": "shutdown"}))
+                except Exception:
+                    pass
             self.close()
 
     def change_language(self, index):
         self.LANG = "ru" if index == 0 else "en"
         try:
-            self.file_btn.setText("Выбрать файл" if self.LANG == "ru" else "Select File")
+            self.file_btn.setText("Выбрать файлы" if self.LANG == "ru" else "Select Files")
             self.folder_btn.setText("Выбрать папку" if self.LANG == "ru" else "Select Folder")
             self.extract_btn.setText("Извлечь картинки" if self.LANG == "ru" else "Extract Images")
             self.extract_v2_btn.setText("Извлечь из файла картинки (улучшенная)" if self.LANG == "ru" else "Extract Images (Improved)")
             self.recovery_btn.setText("Извлечь recovery" if self.LANG == "ru" else "Extract recovery")
             self.boot_btn.setText("Извлечь boot" if self.LANG == "ru" else "Extract boot")
-            self.stop_btn.setText("Остановить извлечение" if self.LANG == "ru" else "Stop Extraction")
+            self.param_btn.setText("Извлечь param" if self.LANG == "ru" else "Extract param")
+            self.stop_btn.setText("Остановить все" if self.LANG == "ru" else "Stop All")
             self.restart_btn.setText("Перезапустить Extractor" if self.LANG == "ru" else "Restart Extractor")
             self.exit_btn.setText("Выйти" if self.LANG == "ru" else "Exit")
+            self.queue.set_language(self.LANG)
         except Exception:
             pass
 